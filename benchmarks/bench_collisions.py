@@ -0,0 +1,83 @@
+"""Frame cost of the projectile/enemy hit check, brute force vs. the spatial grid.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_collisions [--enemies 500] [--projectiles 500]
+"""
+import argparse
+import random
+import time
+
+from src.core.settings import *
+from src.core.path import PathTable
+from src.core.spatial_grid import SpatialGrid
+from src.entities.enemy import Enemy
+from src.entities.projectile import Projectile
+
+
+def make_scene(num_enemies, num_projectiles, seed=0):
+    rng = random.Random(seed)
+    width = GRID_WIDTH * TILE_SIZE
+    height = GRID_HEIGHT * TILE_SIZE
+    path = PathTable([(0, 0), (GRID_WIDTH - 1, 0)])
+
+    enemies = []
+    for _ in range(num_enemies):
+        enemy = Enemy('syntax_error', path)
+        enemy.rect.center = (rng.randrange(width), rng.randrange(height))
+        enemies.append(enemy)
+
+    projectiles = []
+    for _ in range(num_projectiles):
+        start = (rng.randrange(width), rng.randrange(height))
+        projectiles.append(Projectile(start, start, 1))
+    return enemies, projectiles
+
+
+def brute_force(enemies, projectiles, grid):
+    hits = 0
+    for projectile in projectiles:
+        for enemy in enemies:
+            if projectile.rect.colliderect(enemy.rect):
+                hits += 1
+                break
+    return hits
+
+
+def broad_phase(enemies, projectiles, grid):
+    grid.rebuild(enemies)
+    hits = 0
+    for projectile in projectiles:
+        if grid.query_rect(projectile.rect):
+            hits += 1
+    return hits
+
+
+def time_frames(check, enemies, projectiles, frames):
+    grid = SpatialGrid(TILE_SIZE)
+    hits = check(enemies, projectiles, grid)
+    start = time.perf_counter()
+    for _ in range(frames):
+        check(enemies, projectiles, grid)
+    return (time.perf_counter() - start) / frames * 1000.0, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--enemies', type=int, default=500)
+    parser.add_argument('--projectiles', type=int, default=500)
+    parser.add_argument('--frames', type=int, default=20)
+    args = parser.parse_args()
+
+    enemies, projectiles = make_scene(args.enemies, args.projectiles)
+    before, hits_before = time_frames(brute_force, enemies, projectiles, args.frames)
+    after, hits_after = time_frames(broad_phase, enemies, projectiles, args.frames)
+
+    print(f"{args.enemies} enemies x {args.projectiles} projectiles, {args.frames} frames")
+    print(f"  brute force:  {before:8.2f} ms/frame  ({hits_before} hits)")
+    print(f"  spatial grid: {after:8.2f} ms/frame  ({hits_after} hits)")
+    print(f"  speedup:      {before / after:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Tick cost of moving a large wave: per-sprite Enemy.update vs. the NumPy EnemyStore.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_enemy_store [--enemies 10000] [--ticks 120]
+"""
+import argparse
+import time
+
+from src.core.settings import *
+from src.core.simulation import Simulation
+
+
+def fill(sim, count):
+    # Spread the wave along the path so enemies are not all stacked on the spawn tile
+    for i in range(count):
+        sim.spawn_enemy('syntax_error')
+    for i, enemy in enumerate(list(sim.enemies)):
+        distance = sim.path.total_length * i / count
+        if sim.enemy_store is not None:
+            sim.enemy_store.distance[enemy.slot] = distance
+        else:
+            enemy.distance = distance
+
+
+def time_ticks(vectorized, count, ticks):
+    sim = Simulation(vectorized=vectorized)
+    sim.lives = 10 ** 9
+    fill(sim, count)
+    time_delta = 1.0 / FPS
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step(time_delta)
+    elapsed = time.perf_counter() - start
+    return elapsed / ticks * 1000.0, len(sim.enemies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--enemies', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=120)
+    args = parser.parse_args()
+
+    print(f"{args.enemies} enemies, {args.ticks} ticks")
+    for name, vectorized in (('sprites', False), ('enemy store', True)):
+        ms, remaining = time_ticks(vectorized, args.enemies, args.ticks)
+        print(f"  {name:12s} {ms:8.2f} ms/tick  {1000.0 / ms:8.1f} ticks/s  ({remaining} left)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Cost of placing and selling towers on a large open map: incremental flow-field repair vs. a full rebuild.
+
+Two layouts: an empty field, and a maze of long serpentine corridors where
+one tower can lengthen the way out of most of the map (the worst case for
+the incremental repair, which then carries on over many steps).
+Each placement is timed in two parts, as the game does it: the check that
+it leaves the spawns a way out (can_block) and the repair (block). Each
+step of an unfinished repair is timed separately. After every layout, and
+with --check after every placement and sale, the field is settled and
+compared with a full rebuild.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_flow_field [--size 200] [--towers 4000] [--check]
+"""
+import argparse
+import random
+import time
+
+from src.core.settings import *
+from src.core.maps import compile_map
+from src.core.flow_field import FlowField
+
+
+def make_field(size, maze=False):
+    # Enemies enter along the left edge and leave along the right one
+    blocked = []
+    if maze:
+        # Walls every 4 columns, open 3 tiles at the bottom and top in turn
+        for wall, x in enumerate(range(3, size - 1, 4)):
+            gap = range(size - 3, size) if wall % 2 == 0 else range(3)
+            blocked.extend([x, y] for y in range(size) if y not in gap)
+    game_map = compile_map({
+        'width': size,
+        'height': size,
+        'spawns': [[0, y] for y in range(0, size, 10)],
+        'exits': [[size - 1, y] for y in range(size)],
+        'blocked': blocked,
+    }, 'bench')
+    return FlowField(game_map, bytearray(game_map.occupancy))
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def settle(field, settle_times):
+    # One slice of the unfinished repair per simulated step, as Simulation.step does
+    while field.pending:
+        start = time.perf_counter()
+        field.settle()
+        settle_times.append((time.perf_counter() - start) * 1000.0)
+
+
+def run(name, field, rng, towers, check):
+    size = field.width
+    placed, refused, mismatches = [], 0, 0
+    check_times, place_times, sell_times, settle_times = [], [], [], []
+
+    # Random placements, then selling them all again
+    for _ in range(towers):
+        index = rng.randrange(size * size)
+        if field.grid[index] != 0:
+            continue
+        start = time.perf_counter()
+        ok = field.can_block(index)
+        check_times.append((time.perf_counter() - start) * 1000.0)
+        if not ok:
+            refused += 1
+            continue
+        field.grid[index] = 1
+        start = time.perf_counter()
+        field.block(index)
+        place_times.append((time.perf_counter() - start) * 1000.0)
+        placed.append(index)
+        settle(field, settle_times)
+        if check and not field.verify():
+            mismatches += 1
+    rng.shuffle(placed)
+    for index in placed:
+        field.grid[index] = 0
+        start = time.perf_counter()
+        field.unblock(index)
+        sell_times.append((time.perf_counter() - start) * 1000.0)
+        settle(field, settle_times)
+        if check and not field.verify():
+            mismatches += 1
+    if not field.verify():
+        mismatches += 1
+
+    start = time.perf_counter()
+    field.rebuild()
+    rebuild_ms = (time.perf_counter() - start) * 1000.0
+
+    print(f"{name}: {len(check_times)} placements ({refused} refused), {len(sell_times)} sales, "
+          f"{len(settle_times)} repair steps, {mismatches} mismatches with a full rebuild")
+    print(f"  full rebuild:               {rebuild_ms:8.2f} ms")
+    for label, times in (('check', check_times), ('place', place_times), ('sell', sell_times),
+                          ('step', settle_times)):
+        if not times:
+            continue
+        times.sort()
+        print(f"  {label:5s} p50 {percentile(times, 0.5):6.3f} ms  p99 {percentile(times, 0.99):6.3f} ms  "
+              f"max {times[-1]:6.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=200)
+    parser.add_argument('--towers', type=int, default=4000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true', help="compare with a full rebuild after every change")
+    args = parser.parse_args()
+
+    for name, maze in (('open', False), ('maze', True)):
+        start = time.perf_counter()
+        field = make_field(args.size, maze)
+        build_ms = (time.perf_counter() - start) * 1000.0
+        print(f"{args.size}x{args.size} {name} map, build (neighbours + field): {build_ms:.2f} ms")
+        run(name, field, random.Random(args.seed), args.towers, args.check)
+
+
+if __name__ == '__main__':
+    main()
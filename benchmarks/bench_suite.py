@@ -0,0 +1,266 @@
+"""Canned stress scenarios with throughput, frame-time percentiles and memory.
+
+Run from the repository root (no window is opened):
+
+    python -m benchmarks.bench_suite [--scenario NAME ...] [--save results.json]
+    python -m benchmarks.bench_suite --baseline baseline.json [--threshold 0.15]
+
+Each scenario is timed unit by unit (a logic tick, or a drawn frame for the
+draw scenarios), then set up again under tracemalloc to measure the net
+blocks allocated per unit and the peak traced memory. With --baseline the run exits
+with status 1 if any scenario's throughput falls more than --threshold below
+the baseline, so CI can fail on regressions. Baselines are machine-specific:
+record one with --save on the machine that checks against it.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from src.core.maps import TILE_EMPTY
+from src.core.settings import *
+from src.core.simulation import Simulation
+from src.core.status_effects import make_effect
+
+SCENARIOS = {}
+
+
+def scenario(name, units):
+    """Register a setup function; it returns a callable that runs one unit"""
+    def register(setup):
+        SCENARIOS[name] = (setup, units)
+        return setup
+    return register
+
+
+def spread(sim):
+    # Spread the enemies along the path so they are not all stacked on the spawn tile
+    enemies = list(sim.enemies)
+    for i, enemy in enumerate(enemies):
+        distance = enemy.path.total_length * i / len(enemies)
+        if sim.enemy_store is not None:
+            sim.enemy_store.distance[enemy.slot] = distance
+        else:
+            enemy.distance = distance
+            enemy.path_index, x, y = enemy.path.locate(distance)
+            enemy.rect.center = (int(x), int(y))
+
+
+def start_wave_at(sim, wave):
+    """Start wave (1-based) and spawn all of its enemies at once"""
+    sim.wave = wave
+    sim.wave_manager.current_wave = wave - 1
+    sim.start_wave()
+    for lane in sim.wave_manager.lanes:
+        while lane.remaining:
+            sim.spawn_enemy(lane.pop(), lane.next_route())
+    spread(sim)
+
+
+def tiles_near_path(sim, reach=2):
+    """Free tiles within reach tiles of the path, in row order"""
+    path_tiles = {point for route in sim.routes for point in route.points}
+    tiles = []
+    for y in range(sim.map.height):
+        for x in range(sim.map.width):
+            if sim.tile(x, y) != TILE_EMPTY:
+                continue
+            if any((x + dx, y + dy) in path_tiles
+                   for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)):
+                tiles.append((x, y))
+    return tiles
+
+
+def rich_simulation(**kwargs):
+    sim = Simulation(**kwargs)
+    sim.money = 10 ** 9
+    sim.lives = 10 ** 9
+    return sim
+
+
+def tick(sim):
+    time_delta = 1.0 / LOGIC_TICK_RATE
+    return lambda: sim.step(time_delta)
+
+
+@scenario('wave_80_40_towers', units=300)
+def wave_80_40_towers():
+    sim = rich_simulation()
+    shooters = ['basic_compiler', 'code_injector', 'static_analyzer', 'recursive_function', 'async_processor']
+    for i, (x, y) in enumerate(tiles_near_path(sim, reach=1)[:40]):
+        sim.place_tower(shooters[i % len(shooters)], x, y)
+    start_wave_at(sim, 80)
+    return tick(sim)
+
+
+def ten_thousand(vectorized, effect=None):
+    sim = rich_simulation(vectorized=vectorized)
+    for _ in range(10000):
+        sim.spawn_enemy('syntax_error')
+    spread(sim)
+    if effect is not None:
+        for enemy in sim.enemies:
+            sim.apply_effect(enemy, effect)
+    return tick(sim)
+
+
+# A timed slow outlasting the run on top of a permanent one, so every enemy stays slowed
+LASTING_SLOW = make_effect(slow=0.5, slow_duration=3600, permanent_slow=0.9, permanent_floor=0.5)
+
+
+@scenario('10k_syntax_errors', units=60)
+def ten_thousand_sprites():
+    return ten_thousand(False)
+
+
+@scenario('10k_syntax_errors_vectorized', units=300)
+def ten_thousand_vectorized():
+    return ten_thousand(True)
+
+
+@scenario('10k_slowed', units=60)
+def ten_thousand_slowed_sprites():
+    return ten_thousand(False, LASTING_SLOW)
+
+
+@scenario('10k_slowed_vectorized', units=300)
+def ten_thousand_slowed_vectorized():
+    return ten_thousand(True, LASTING_SLOW)
+
+
+@scenario('all_quantum_computers', units=300)
+def all_quantum_computers():
+    sim = rich_simulation()
+    for x, y in tiles_near_path(sim):
+        sim.place_tower('quantum_computer', x, y)
+    start_wave_at(sim, 79)
+    return tick(sim)
+
+
+@scenario('full_screen_glow_draw', units=120)
+def full_screen_glow_draw():
+    from src.core.game import Game
+    game = Game()
+    game.money = game.lives = 10 ** 9
+    rng = random.Random(0)
+
+    # Towers on every other free tile and enemies all over the map, all glowing
+    for y in range(0, GRID_HEIGHT, 2):
+        for x in range(0, GRID_WIDTH, 2):
+            game.place_tower('basic_compiler', x, y)
+    for _ in range(2000):
+        game.spawn_enemy('syntax_error')
+    for enemy in game.enemies:
+        enemy.rect.center = (rng.randrange(GRID_WIDTH * TILE_SIZE), rng.randrange(GRID_HEIGHT * TILE_SIZE))
+    return game.draw
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100.0 * len(sorted_values)))]
+
+
+def time_units(run, units, warmup=5):
+    for _ in range(warmup):
+        run()
+    times = []
+    for _ in range(units):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    total = sum(times)
+    times.sort()
+    return {
+        'per_second': units / total,
+        'p50_ms': percentile(times, 50) * 1000.0,
+        'p99_ms': percentile(times, 99) * 1000.0,
+    }
+
+
+def measure_memory(setup, units):
+    tracemalloc.start()
+    try:
+        run = setup()
+        before = tracemalloc.take_snapshot()
+        for _ in range(units):
+            run()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    return {
+        'allocated_blocks_per_unit': sum(stat.count_diff for stat in stats) / units,
+        'allocated_kib_per_unit': sum(stat.size_diff for stat in stats) / units / 1024.0,
+        'peak_mib': peak / (1024.0 * 1024.0),
+    }
+
+
+def run_scenario(name, units=None, memory=True):
+    setup, default_units = SCENARIOS[name]
+    units = units or default_units
+    result = {'units': units}
+    result.update(time_units(setup(), units))
+    if memory:
+        # Fewer units under tracemalloc, it slows everything down a lot
+        result.update(measure_memory(setup, max(1, units // 10)))
+    return result
+
+
+def check_regressions(results, baseline, threshold):
+    failures = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        floor = baseline[name]['per_second'] * (1.0 - threshold)
+        if result['per_second'] < floor:
+            failures.append(f"{name}: {result['per_second']:.1f}/s is below {floor:.1f}/s "
+                            f"(baseline {baseline[name]['per_second']:.1f}/s)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="run only this scenario (repeatable)")
+    parser.add_argument('--units', type=int, help="ticks/frames to time per scenario")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--save', help="write the results as JSON (usable as a baseline)")
+    parser.add_argument('--baseline', help="JSON results to compare throughput against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed throughput drop vs. the baseline (default 0.15)")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name, args.units, not args.no_memory)
+        results[name] = result
+        line = (f"{name:30s} {result['per_second']:9.1f}/s  p50 {result['p50_ms']:7.2f} ms"
+                f"  p99 {result['p99_ms']:7.2f} ms")
+        if 'peak_mib' in result:
+            line += (f"  {result['allocated_blocks_per_unit']:8.1f} blocks/unit"
+                     f"  peak {result['peak_mib']:6.1f} MiB")
+        print(line, flush=True)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = check_regressions(results, baseline, args.threshold)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Headless balance simulator.
+
+Plays many games without a window, one per tower layout and balance
+setting, spread across all cores. Examples:
+
+    python simulate.py --tower basic_compiler:5:11 --tower static_analyzer:11:5@3
+    python simulate.py --map twin_bus --tower basic_compiler:9:7 --tower basic_compiler:9:17
+    python simulate.py --layouts layouts.json --grid grid.json --waves 1-40 --json results.json
+    python simulate.py --replay replays/replay_20240101_120000.json
+    python simulate.py --snapshot saves/quicksave.snap --tower basic_compiler:5:11 --waves 1-60
+
+layouts.json is a list of layouts, each a list of "type:x:y[@wave]" strings.
+grid.json maps balance parameters to the values to try, e.g.
+{"tower.basic_compiler.damage": [1, 2], "scaling.health_multiplier": [1.1, 1.2]}
+--replay re-runs recorded games at uncapped speed and checks they end the same.
+--snapshot starts every game from a saved game instead of wave 1.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from src.core.batch import make_jobs, parse_placement, run_batch, summarize
+from src.core.maps import MapError, load_map
+from src.core.replay import load_replay, play_replay, verify_replay
+from src.core.settings import DEFAULT_MAP
+
+
+def parse_waves(text):
+    first, _, last = text.partition('-')
+    return int(first), int(last) if last else None
+
+
+def check_vectorized(parser, map_name):
+    """Exit with a usage error if the NumPy enemy store can't play map_name (open maps)"""
+    try:
+        game_map = load_map(map_name or DEFAULT_MAP)
+    except MapError as e:
+        parser.error(str(e))
+    if game_map.open:
+        parser.error(f"--vectorized can't play map '{game_map.name}': enemies on open maps need the flow field")
+
+
+def format_stats(stats):
+    if stats is None:
+        return '-'
+    return f"{stats['min']:g} / {stats['median']:g} / {stats['mean']:.1f} / {stats['max']:g}"
+
+
+def print_summary(summaries):
+    for summary in summaries:
+        params = ', '.join(f'{name}={value}' for name, value in summary['params'].items()) or 'default balance'
+        print(f"\n== {params} ({summary['games']} games)")
+        print(f"  survived wave      {format_stats(summary['survived_wave'])}  (min / median / mean / max)")
+        print(f"  lives lost         {format_stats(summary['lives_lost'])}")
+        curve = summary['money_curve']
+        if curve:
+            step = max(1, len(curve) // 10)
+            first = summary['first_wave']
+            points = ', '.join(f'w{first + i}:{curve[i]:.0f}' for i in range(0, len(curve), step))
+            print(f"  money after wave   {points}")
+        for tower_type, stats in summary['towers'].items():
+            print(f"  {tower_type}")
+            print(f"    damage dealt     {format_stats(stats['damage_dealt'])}")
+            print(f"    shots fired      {format_stats(stats['shots_fired'])}")
+
+
+def run_replays(paths, vectorized):
+    """Replay each file, report its speed, and return False if any diverged"""
+    ok = True
+    for path in paths:
+        replay = load_replay(path)
+        start = time.perf_counter()
+        sim = play_replay(replay, vectorized=vectorized)
+        elapsed = time.perf_counter() - start
+        mismatches = verify_replay(replay, sim)
+        status = 'ok' if not mismatches else 'MISMATCH'
+        print(f"{path}: {sim.tick} ticks in {elapsed:.2f}s ({sim.tick / max(elapsed, 1e-9):.0f} ticks/s), "
+              f"wave {sim.wave}, money {sim.money}, lives {sim.lives} - {status}")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
+        ok = ok and not mismatches
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless games in parallel to tune tower and wave balance.")
+    parser.add_argument('--tower', action='append', default=[], metavar='TYPE:X:Y[@WAVE]',
+                        help="place a tower (repeatable); @WAVE delays the purchase until that wave")
+    parser.add_argument('--layouts', help="JSON file with a list of tower layouts")
+    parser.add_argument('--grid', help="JSON file mapping balance parameters to lists of values")
+    parser.add_argument('--waves', default='1', help="wave range to play, e.g. 1-100 or 20-40 (default: all)")
+    parser.add_argument('--money', type=int, help="starting money")
+    parser.add_argument('--lives', type=int, help="starting lives")
+    parser.add_argument('--vectorized', action='store_true', help="use the NumPy enemy store")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--json', help="write every game's results and the summary to this file")
+    parser.add_argument('--map', help="map to play, from assets/maps (default: %(default)s)", default=DEFAULT_MAP)
+    parser.add_argument('--snapshot', help="fork every game from this saved game (F5 in the game)")
+    parser.add_argument('--replay', action='append', default=[], metavar='FILE',
+                        help="replay a recorded game and check its outcome (repeatable)")
+    args = parser.parse_args()
+
+    if args.replay:
+        if args.vectorized:
+            for path in args.replay:
+                check_vectorized(parser, load_replay(path).get('map'))
+        sys.exit(0 if run_replays(args.replay, args.vectorized) else 1)
+
+    layouts = []
+    if args.tower:
+        layouts.append([parse_placement(text) for text in args.tower])
+    if args.layouts:
+        with open(args.layouts) as f:
+            layouts.extend([parse_placement(text) for text in layout] for layout in json.load(f))
+    if args.snapshot:
+        with open(args.snapshot, 'rb') as f:
+            snapshot = f.read()
+        layouts = layouts or [[]]  # The saved towers alone are a layout
+    elif not layouts:
+        parser.error("give at least one --tower or a --layouts file")
+    if args.vectorized and not args.snapshot:
+        check_vectorized(parser, args.map)  # A snapshot brings its own map and enemy store
+
+    grid = None
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+
+    options = {'vectorized': args.vectorized, 'map': args.map}
+    if args.snapshot:
+        options['snapshot'] = snapshot
+    if args.money is not None:
+        options['money'] = args.money
+    if args.lives is not None:
+        options['lives'] = args.lives
+
+    first_wave, last_wave = parse_waves(args.waves)
+    jobs = make_jobs(layouts, grid, first_wave, last_wave, **options)
+
+    start = time.perf_counter()
+    results = run_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+
+    summaries = summarize(results)
+    print_summary(summaries)
+    print(f"\n{len(results)} games, {sum(result['ticks'] for result in results)} ticks in {elapsed:.1f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'results': results, 'summary': summaries}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Headless balance runs: play many games in parallel and summarize them.
+
+Each job is one game with a tower layout, a range of waves and a set of
+balance overrides. Jobs are independent, so they are spread over a
+ProcessPoolExecutor and scale with the number of cores. Every worker builds
+its own Simulation with copied stats, so overrides never leak between jobs.
+"""
+import copy
+import itertools
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from .settings import *
+from .simulation import Simulation
+from .snapshot import load_snapshot
+from .waves import WaveConfigs
+
+
+def parse_placement(text):
+    """Parse 'tower_type:grid_x:grid_y[@wave]' into a placement dict"""
+    spec, _, wave = text.partition('@')
+    tower_type, grid_x, grid_y = spec.split(':')
+    if tower_type not in TOWER_TYPES:
+        raise ValueError(f"unknown tower type '{tower_type}'")
+    return {
+        'type': tower_type,
+        'x': int(grid_x),
+        'y': int(grid_y),
+        'wave': int(wave) if wave else 1,  # Placed before this wave starts
+    }
+
+
+def expand_grid(grid):
+    """Turn {'name': [values, ...]} into one params dict per combination"""
+    if not grid:
+        return [{}]
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def apply_params(params):
+    """Build the tower stats and wave configs for one set of overrides.
+
+    Keys are dotted paths: 'tower.<type>.<stat>', 'scaling.<key>' or
+    'scaling.base_counts.<enemy_type>'.
+    """
+    tower_types = copy.deepcopy(TOWER_TYPES)
+    scaling = copy.deepcopy(WAVE_CONFIGS.scaling)
+
+    for name, value in params.items():
+        section, *keys = name.split('.')
+        if section == 'tower' and len(keys) == 2:
+            target = tower_types[keys[0]]
+        elif section == 'scaling' and keys:
+            target = scaling
+            for key in keys[:-1]:
+                target = target[key]
+        else:
+            raise ValueError(f"unknown balance parameter '{name}'")
+        if keys[-1] not in target:
+            raise ValueError(f"unknown balance parameter '{name}'")
+        target[keys[-1]] = value
+
+    return tower_types, WaveConfigs(scaling, WAVE_CONFIGS.wave_count, WAVE_CONFIGS.overrides)
+
+
+def fork_snapshot(snapshot, tower_types, waves):
+    """Continue from a saved game, with the job's balance applied to its towers"""
+    sim = load_snapshot(snapshot, tower_types=tower_types, waves=waves)
+    for tower in sim.towers:
+        tower.damage = tower.stats['damage']
+        tower.range = tower.stats['range']
+        tower.cooldown = tower.stats['cooldown']
+    return sim
+
+
+def run_game(job):
+    """Play one job to completion. Runs in a worker process.
+
+    With a 'snapshot' (bytes from snapshot.save_snapshot) the game continues
+    from that save, finishing any wave in progress, instead of starting fresh.
+    'map' names the map to play (default DEFAULT_MAP); a snapshot brings its own.
+    """
+    tower_types, waves = apply_params(job.get('params', {}))
+    last_wave = job.get('last_wave') or waves.wave_count
+    if last_wave is None:
+        raise ValueError("endless waves need an explicit last_wave")
+
+    ticks = 0
+    if job.get('snapshot'):
+        sim = fork_snapshot(job['snapshot'], tower_types, waves)
+        if 'money' in job:
+            sim.money = job['money']
+        if 'lives' in job:
+            sim.lives = job['lives']
+        starting_lives = sim.lives
+        ticks += sim.finish_wave()
+        first_wave = sim.wave_manager.current_wave + 1
+    else:
+        sim = Simulation(vectorized=job.get('vectorized', False), tower_types=tower_types, waves=waves,
+                         game_map=job.get('map'))
+        sim.money = job.get('money', STARTING_MONEY)
+        starting_lives = sim.lives = job.get('lives', STARTING_LIVES)
+
+        # Jump straight to the first wave of the range
+        first_wave = job.get('first_wave', 1)
+        sim.wave = first_wave
+        sim.wave_manager.current_wave = first_wave - 1
+
+    pending = sorted(job.get('placements', []), key=lambda placement: placement['wave'])
+    towers = list(sim.towers)
+    money_curve = []
+    survived_wave = first_wave - 1 if not sim.game_over else first_wave - 2
+
+    for wave in range(first_wave, last_wave + 1):
+        # Buy every tower that is due and affordable; the rest wait for a later wave
+        waiting = []
+        for placement in pending:
+            tower = None
+            if placement['wave'] <= wave:
+                tower = sim.place_tower(placement['type'], placement['x'], placement['y'])
+            if tower is not None:
+                towers.append(tower)
+            else:
+                waiting.append(placement)
+        pending = waiting
+
+        if sim.game_over:
+            break
+        wave_ticks = sim.play_wave()
+        if wave_ticks is None:
+            break
+        ticks += wave_ticks
+        money_curve.append(sim.money)
+        if sim.game_over:
+            break
+        survived_wave = wave
+
+    return {
+        'params': job.get('params', {}),
+        'layout': job.get('layout', 0),
+        'first_wave': first_wave,
+        'survived_wave': survived_wave,
+        'lives_lost': starting_lives - max(sim.lives, 0),
+        'final_money': sim.money,
+        'money_curve': money_curve,
+        'ticks': ticks,
+        'unplaced': len(pending),
+        'towers': [
+            {
+                'type': tower.type,
+                'x': tower.rect.centerx // TILE_SIZE,
+                'y': tower.rect.centery // TILE_SIZE,
+                'damage_dealt': tower.damage_dealt,
+                'shots_fired': tower.shots_fired,
+                'enemies_defeated': tower.enemies_defeated,
+            }
+            for tower in towers
+        ],
+    }
+
+
+def make_jobs(layouts, grid=None, first_wave=1, last_wave=None, **options):
+    """One job for every combination of layout and grid parameters"""
+    return [
+        dict(options, params=params, layout=index, placements=placements,
+             first_wave=first_wave, last_wave=last_wave)
+        for params in expand_grid(grid)
+        for index, placements in enumerate(layouts)
+    ]
+
+
+def run_batch(jobs, workers=None):
+    """Run jobs across processes, returning results in job order.
+
+    workers=1 runs everything in this process, which is easier to profile.
+    """
+    if workers == 1 or len(jobs) <= 1:
+        return [run_game(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_game, jobs))
+
+
+def describe(values):
+    """min / median / mean / max of a list of numbers"""
+    if not values:
+        return None
+    return {
+        'min': min(values),
+        'median': statistics.median(values),
+        'mean': statistics.fmean(values),
+        'max': max(values),
+    }
+
+
+def summarize(results):
+    """Group results by parameter set and describe each group's distributions"""
+    groups = {}
+    for result in results:
+        key = tuple(sorted(result['params'].items()))
+        groups.setdefault(key, []).append(result)
+
+    summaries = []
+    for key, group in groups.items():
+        tower_stats = {}
+        for result in group:
+            for tower in result['towers']:
+                stats = tower_stats.setdefault(tower['type'], {'damage_dealt': [], 'shots_fired': []})
+                stats['damage_dealt'].append(tower['damage_dealt'])
+                stats['shots_fired'].append(tower['shots_fired'])
+
+        # Average money after each wave, over the games that got that far
+        longest = max(len(result['money_curve']) for result in group)
+        money_curve = [
+            statistics.fmean(result['money_curve'][i] for result in group if len(result['money_curve']) > i)
+            for i in range(longest)
+        ]
+
+        summaries.append({
+            'params': dict(key),
+            'games': len(group),
+            'first_wave': min(result['first_wave'] for result in group),
+            'survived_wave': describe([result['survived_wave'] for result in group]),
+            'lives_lost': describe([result['lives_lost'] for result in group]),
+            'money_curve': money_curve,
+            'towers': {
+                tower_type: {name: describe(values) for name, values in stats.items()}
+                for tower_type, stats in tower_stats.items()
+            },
+        })
+    return summaries
@@ -0,0 +1,46 @@
+"""Game state change events.
+
+The simulation emits these as state changes; the UI, stats tracking and
+telemetry subscribe to them instead of polling every frame. Listeners are
+called synchronously with the positional arguments noted for each event.
+"""
+
+MONEY_CHANGED = 'money_changed'      # (old, new)
+LIVES_CHANGED = 'lives_changed'      # (old, new)
+WAVE_STARTED = 'wave_started'        # (wave_number,) 1-based
+WAVE_COMPLETED = 'wave_completed'    # (wave_number, bonus)
+TOWER_PLACED = 'tower_placed'        # (tower,)
+TOWER_SOLD = 'tower_sold'            # (tower, refund)
+ENEMY_KILLED = 'enemy_killed'        # (enemy, tower) tower is None if it was sold
+ENEMY_LEAKED = 'enemy_leaked'        # (enemy,)
+
+
+class EventBus:
+    """Synchronous publish/subscribe keyed by event name.
+
+    Emitting an event nobody listens to is a single dict lookup, and hot
+    paths can check `listening` first to skip building the arguments.
+    """
+
+    def __init__(self):
+        self.listeners = {}
+
+    def subscribe(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+        return callback
+
+    def unsubscribe(self, event, callback):
+        callbacks = self.listeners.get(event)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+            if not callbacks:
+                del self.listeners[event]
+
+    def listening(self, event):
+        return event in self.listeners
+
+    def emit(self, event, *args):
+        callbacks = self.listeners.get(event)
+        if callbacks:
+            for callback in tuple(callbacks):
+                callback(*args)
@@ -0,0 +1,363 @@
+import heapq
+from collections import deque
+
+import pygame
+
+from .settings import *
+from .maps import TILE_TOWER, TILE_BLOCKED
+
+WALL = -1
+UNREACHABLE = 1 << 30
+
+# Work limits, in tiles; a repaired tile costs about 2 us (see benchmarks/bench_flow_field.py)
+LOCAL_SEARCH = 64  # Searched around a placement before flood filling the whole map
+REPAIR_BUDGET = 150  # Repaired straight away when a tower is placed or sold
+SETTLE_BUDGET = 400  # Repaired per simulation step while a repair is unfinished
+
+
+class FlowField:
+    """Distance to the nearest exit for every tile of an open map.
+
+    dist holds the step count per tile (row-major like the grid), WALL for
+    towers and blocked tiles, UNREACHABLE for tiles cut off from every exit;
+    enemies step to the neighbour closest to an exit. Placing or selling a
+    tower repairs only the tiles it affects, over later steps if the repair
+    outgrows the budgets (see settle).
+    """
+
+    def __init__(self, game_map, grid):
+        self.width = game_map.width
+        self.height = game_map.height
+        self.grid = grid
+        self.spawns = [y * self.width + x for x, y in game_map.spawns]
+        self.exits = [y * self.width + x for x, y in game_map.exits]
+        self.size = self.width * self.height
+        self.spawn_set = set(self.spawns)
+        self.exit_set = set(self.exits)
+
+        # 4-connected neighbours of each tile, in a fixed order so ties break the same way every game
+        width, height = self.width, self.height
+        self.neighbours = []
+        for y in range(height):
+            for x in range(width):
+                index = y * width + x
+                near = []
+                if y > 0:
+                    near.append(index - width)
+                if x < width - 1:
+                    near.append(index + 1)
+                if y < height - 1:
+                    near.append(index + width)
+                if x > 0:
+                    near.append(index - 1)
+                self.neighbours.append(tuple(near))
+
+        self.spawn_mask = pygame.mask.Mask((2 * width - 1, 2 * height - 1))
+        for x, y in game_map.spawns:
+            self.spawn_mask.set_at((2 * x, 2 * y))
+
+        self.dist = []
+        self.version = 0  # Moves on with every change of walls, see can_block
+        self.verdict_key = None  # (tile, version) the cut_off verdict was worked out for
+        self.verdict = None
+        self.rebuild()
+
+    def rebuild(self):
+        """Recompute every tile's distance and the mask from the grid"""
+        dist = [WALL if tile == TILE_TOWER or tile == TILE_BLOCKED else UNREACHABLE for tile in self.grid]
+        queue = deque(self.exits)
+        for index in self.exits:
+            dist[index] = 0
+        neighbours = self.neighbours
+        while queue:
+            index = queue.popleft()
+            step = dist[index] + 1
+            for near in neighbours[index]:
+                if dist[near] > step:
+                    dist[near] = step
+                    queue.append(near)
+        self.dist = dist
+        self.ahead = list(dist)  # What each tile's distance should be given its neighbours' (see _look_ahead)
+        self.queue = []  # Heap of distance * size + tile for tiles whose dist and ahead differ
+        self._build_mask()
+        self.version += 1
+
+    def restore(self, dist):
+        """Take over saved distances (walls where the grid has them), possibly mid-repair,
+        and queue whatever they still get wrong"""
+        self.dist = dist
+        self.ahead = [WALL] * len(dist)
+        self.queue = []
+        for index, d in enumerate(dist):
+            if d != WALL:
+                self._look_ahead(index)
+        self._build_mask()
+        self.version += 1
+
+    def _build_mask(self):
+        # Open tiles and the links between them, see can_block
+        dist = self.dist
+        width = self.width
+        self.mask = mask = pygame.mask.Mask((2 * width - 1, 2 * self.height - 1))
+        set_at = mask.set_at
+        for index, d in enumerate(dist):
+            if d == WALL:
+                continue
+            x, y = index % width, index // width
+            set_at((2 * x, 2 * y))
+            for near in self.neighbours[index]:
+                if near > index and dist[near] != WALL:
+                    set_at((x + near % width, y + near // width))
+
+    def _look_ahead(self, index):
+        """Recompute what open tile index's distance should be from its neighbours', and queue
+        the tile if that isn't its distance"""
+        dist = self.dist
+        if index in self.exit_set:
+            ahead = 0
+        else:
+            best = UNREACHABLE
+            for near in self.neighbours[index]:
+                d = dist[near]
+                if 0 <= d < best:
+                    best = d
+            ahead = best + 1 if best < UNREACHABLE else UNREACHABLE
+        self.ahead[index] = ahead
+        d = dist[index]
+        if d != ahead:
+            heapq.heappush(self.queue, (d if d < ahead else ahead) * self.size + index)
+
+    @property
+    def pending(self):
+        """Whether a repair is unfinished (dist may then be wrong in places)"""
+        return not self.settle(0)
+
+    def settle(self, budget=SETTLE_BUDGET):
+        """Carry on repairing for up to budget tiles (None finishes the repair).
+
+        Tiles are repaired in order of distance, like a Dijkstra search
+        limited to the tiles a change affected, so the result is exactly
+        what a rebuild would give. Returns True once nothing is left to repair.
+        """
+        dist, ahead, queue = self.dist, self.ahead, self.queue
+        neighbours = self.neighbours
+        size = self.size
+        heappush, heappop = heapq.heappush, heapq.heappop
+        repaired = 0
+        while queue:
+            key, index = divmod(queue[0], size)
+            d, a = dist[index], ahead[index]
+            if d == a or key != (d if d < a else a):
+                heappop(queue)  # Repaired or requeued since
+                continue
+            if budget is not None and repaired >= budget:
+                return False
+            heappop(queue)
+            repaired += 1
+            if a < d:
+                # Shorter than recorded: settle it and offer the neighbours a way through it
+                dist[index] = a
+                step = a + 1
+                for near in neighbours[index]:
+                    if step < ahead[near]:
+                        ahead[near] = step
+                        if dist[near] != step:
+                            heappush(queue, (dist[near] if dist[near] < step else step) * size + near)
+            else:
+                # Longer than recorded: forget it, and look again at it and the tiles that counted on it
+                dist[index] = UNREACHABLE
+                self._look_ahead(index)
+                for near in neighbours[index]:
+                    if ahead[near] == d + 1:
+                        self._look_ahead(near)
+        return True
+
+    def next_tile(self, index):
+        """Return the neighbour to step to from index, or None if there is no way to an exit"""
+        dist = self.dist
+        best = None
+        best_dist = dist[index]
+        if not 0 < best_dist < UNREACHABLE:
+            best_dist = UNREACHABLE
+        for near in self.neighbours[index]:
+            d = dist[near]
+            if 0 <= d < best_dist:
+                best = near
+                best_dist = d
+        return best
+
+    def _set_mask(self, index, is_open):
+        """Mark tile index and its links to the open tiles around it open or walled in the mask"""
+        width = self.width
+        x, y = index % width, index // width
+        set_at = self.mask.set_at
+        set_at((2 * x, 2 * y), is_open)
+        dist = self.dist
+        for near in self.neighbours[index]:
+            if dist[near] != WALL:
+                set_at((x + near % width, y + near // width), is_open)
+
+    def _local_cut_off(self, index):
+        """_cut_off decided by searching at most LOCAL_SEARCH tiles around index, or None.
+
+        One search starts from each open neighbour of index, and searches
+        that meet are merged. Once all have merged, walling index changes no
+        tile's way out, whatever the map looks like further away. A search
+        that runs out of tiles first has found all of a region the wall
+        would close off.
+        """
+        dist = self.dist
+        neighbours = self.neighbours
+        starts = [near for near in neighbours[index] if dist[near] != WALL]
+        if len(starts) <= 1:
+            return True
+
+        cut_off = set()
+        owner = {index: -1}
+        groups = list(range(len(starts)))
+        queues = []
+        for i, tile in enumerate(starts):
+            owner[tile] = i
+            queues.append(deque((tile,)))
+        checked = set()
+        searched = 0
+        while searched < LOCAL_SEARCH:
+            for i, queue in enumerate(queues):
+                if not queue:
+                    continue
+                tile = queue.popleft()
+                searched += 1
+                for near in neighbours[tile]:
+                    if dist[near] == WALL:
+                        continue
+                    other = owner.get(near)
+                    if other is None:
+                        owner[near] = i
+                        queue.append(near)
+                    elif other >= 0 and groups[i] != groups[other]:
+                        merged, kept = groups[i], groups[other]
+                        groups = [kept if group == merged else group for group in groups]
+
+            searching = {groups[i] for i, queue in enumerate(queues) if queue}
+            if len(set(groups)) == 1:
+                return cut_off or True
+            closed = set(groups) - searching - checked
+            if closed:
+                width = self.width
+                for tile, i in owner.items():
+                    if i < 0 or groups[i] not in closed:
+                        continue
+                    if tile in self.exit_set:
+                        return None  # The exits are in here, so it's the rest that may be closed off
+                    if tile in self.spawn_set:
+                        return False
+                    cut_off.add((tile % width, tile // width))
+                checked |= closed
+            if len(searching) <= 1:
+                return cut_off or True  # All but the region with the exits were closed off
+        return None
+
+    def can_block(self, index, occupied=()):
+        """Whether tile index can be walled without cutting a spawn, or one of the occupied
+        (x, y) tiles (the ones with enemies on them), off from every exit.
+
+        The part that doesn't depend on the enemies is kept per tile and
+        version (see _cut_off), so asking again about the same tile only
+        checks occupied against it.
+        """
+        if self.dist[index] == WALL:
+            return False
+        key = (index, self.version)
+        if self.verdict_key != key:
+            self.verdict = self._cut_off(index)
+            self.verdict_key = key
+        cut_off = self.verdict
+        if cut_off is True or cut_off is False:
+            return cut_off
+        if isinstance(cut_off, set):
+            return cut_off.isdisjoint(occupied)
+        return not any(cut_off.get_at((2 * x, 2 * y)) for x, y in occupied)
+
+    def _cut_off(self, index):
+        """What walling open tile index would cut off from every exit: True for nothing,
+        False for a spawn, else the (x, y) tiles as a set or their pixels in a mask.
+
+        A short search around the tile usually settles it (see _local_cut_off).
+        Otherwise one flood fill of `mask` decides, about 0.6-1 ms on a 200x200
+        map: mask has a pixel for every open tile at (2x, 2y) and one between
+        every two adjacent open tiles, so pygame's 8-connected flood fill
+        follows exactly the 4-connected moves enemies make.
+        """
+        cut_off = self._local_cut_off(index)
+        if cut_off is not None:
+            return cut_off
+
+        # Flood fill from the exits without index and see what's left over
+        width = self.width
+        mask = self.mask
+        self._set_mask(index, False)
+        try:
+            reached = pygame.mask.Mask(mask.get_size())
+            for tile in self.exits:
+                pixel = (2 * (tile % width), 2 * (tile // width))
+                if not reached.get_at(pixel):
+                    reached.draw(mask.connected_component(pixel), (0, 0))
+            cut_off = mask.copy()
+            cut_off.erase(reached, (0, 0))
+            if not cut_off.count():
+                return True
+            if cut_off.overlap(self.spawn_mask, (0, 0)):
+                return False
+            return cut_off
+        finally:
+            self._set_mask(index, True)
+
+    def block(self, index):
+        """Turn tile index into a wall (a tower was placed) and start repairing the field.
+
+        Doesn't check the placement, see can_block.
+        """
+        self._set_mask(index, False)
+        self.version += 1
+        old = self.dist[index]
+        self.dist[index] = self.ahead[index] = WALL
+        if old < UNREACHABLE:
+            ahead = self.ahead
+            for near in self.neighbours[index]:
+                if ahead[near] == old + 1:
+                    self._look_ahead(near)
+        self.settle(REPAIR_BUDGET)
+
+    def unblock(self, index):
+        """Turn wall tile index back into open ground (a tower was sold) and start repairing the field"""
+        self.dist[index] = UNREACHABLE
+        self._set_mask(index, True)
+        self.version += 1
+        self._look_ahead(index)
+        self.settle(REPAIR_BUDGET)
+
+    def verify(self):
+        """Whether dist and mask match a full rebuild from the grid (for the benchmarks)"""
+        if self.pending:
+            return False
+        dist, ahead, mask = self.dist, self.ahead, self.mask
+        self.rebuild()
+        ok = dist == self.dist and mask.overlap_area(self.mask, (0, 0)) == mask.count() == self.mask.count()
+        self.dist, self.ahead, self.mask = dist, ahead, mask
+        return ok
+
+
+class FlowRoute:
+    """A spawn point of an open map, used as an enemy's path.
+
+    Stands in for a PathTable when spawning: the enemy starts on the spawn
+    tile and then follows the shared field (see FlowEnemy).
+    """
+
+    def __init__(self, field, spawn):
+        self.field = field
+        self.spawn = spawn
+        x, y = spawn % field.width, spawn // field.width
+        self.points = [(x, y)]
+        self.xs = [x * TILE_SIZE + TILE_SIZE // 2]
+        self.ys = [y * TILE_SIZE + TILE_SIZE // 2]
@@ -1,13 +1,17 @@
 import pygame
 import pygame_gui
 from .settings import *
-from ..managers.asset_manager import AssetManager
-from ..managers.wave_manager import WaveManager
-from ..entities.tower import Tower
+from .simulation import Simulation
+from .maps import TILE_EMPTY, TILE_PATH, TILE_BLOCKED
+from .events import (MONEY_CHANGED, LIVES_CHANGED, WAVE_STARTED, WAVE_COMPLETED,
+                     TOWER_PLACED, TOWER_SOLD)
+from .replay import ReplayRecorder
+from .snapshot import SnapshotError, read_snapshot, write_snapshot
 import math
 import os
+import time
 
-class Game:
+class Game(Simulation):
     def __init__(self):
         pygame.init()
         pygame.display.set_caption(GAME_TITLE)
@@ -17,6 +21,12 @@ class Game:
         self.running = True
         self.game_speed = NORMAL_GAME_SPEED
         
+        # Fixed-timestep logic: frame time is banked and spent in whole ticks,
+        # and sprites are drawn interpolated between the last two ticks
+        self.tick_accumulator = 0.0
+        self.render_alpha = 1.0
+        self.previous_centers = {}
+        
         # Visual effect states
         self.path_pulse_value = 0
         self.particle_systems = []
@@ -25,10 +35,40 @@ class Game:
         self.glow_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
         self.path_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
         
-        # Game state - Initialize these first
-        self.money = STARTING_MONEY
-        self.lives = STARTING_LIVES
-        self.wave = 1
+        # Static background layers, baked by build_background_layers when the grid changes,
+        # and composited into an opaque background only when the path pulse alpha changes
+        self.grid_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        self.background_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.background_alpha = None
+        self.hover_surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        self.hover_surface.fill(GRID_HOVER_COLOR)
+        self.background_dirty = True
+        
+        # Dirty-rect rendering state
+        self.dirty_rect_rendering = DIRTY_RECT_RENDERING
+        self.scene_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.scene_dirty = True
+        self.previous_dirty_rects = []
+        self.gui_dirty = True
+        self.gui_was_active = True
+        self.hud_dirty = True
+        self.hud_money = None  # Values changed since the HUD last showed them (None if unchanged)
+        self.hud_lives = None
+        
+        # Tower button states last shown, so only buttons that change are touched
+        self.tower_button_enabled = {}
+        self.tower_stats_box = None
+        
+        # Game state, managers, sprite groups and grid - Initialize these first
+        super().__init__()
+        
+        # Log inputs so the game can be replayed headlessly
+        if RECORD_REPLAYS:
+            self.recorder = ReplayRecorder(self.seed)
+        
+        # Frame profiler overlay (F3 toggles it, F4 dumps the timings)
+        self.profiler.set_enabled(PROFILER_ENABLED)
+        self.show_profiler = PROFILER_ENABLED
         self.selected_tower = None  # For placement
         self.selected_existing_tower = None  # For showing stats
         
@@ -37,21 +77,17 @@ class Game:
         self.gui_manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT), theme_path)
         self.setup_gui()
         
-        # Initialize managers
-        self.asset_manager = AssetManager()
-        self.wave_manager = WaveManager(self)
-        
-        # Initialize sprite groups
-        self.towers = pygame.sprite.Group()
-        self.enemies = pygame.sprite.Group()
-        self.projectiles = pygame.sprite.Group()
-        
-        # Create path points
-        self.path_points = self.generate_path_points()
-        
-        # Create game map grid (0: empty, 1: tower, 2: path)
-        self.grid = [[0 for x in range(GRID_WIDTH)] for y in range(GRID_HEIGHT)]
-        self.mark_path_on_grid()
+        # The HUD follows the game state through its change events instead of polling
+        self.events.subscribe(MONEY_CHANGED, self.on_money_changed)
+        self.events.subscribe(LIVES_CHANGED, self.on_lives_changed)
+        self.events.subscribe(WAVE_STARTED, self.on_wave_changed)
+        self.events.subscribe(WAVE_COMPLETED, self.on_wave_changed)
+        self.events.subscribe(TOWER_PLACED, self.on_tower_placed)
+        self.events.subscribe(TOWER_SOLD, self.on_tower_sold)
+        self.refresh_hud()
+        
+        # Build sprite and glow surfaces now rather than during the first wave
+        self.asset_manager.prewarm()
     
     def setup_gui(self):
         # Main game panel with semi-transparent dark background
@@ -190,7 +226,7 @@ class Game:
         
         self.wave_label = pygame_gui.elements.UILabel(
             relative_rect=pygame.Rect((10, 70), (210, 25)),
-            text=f'Wave: {self.wave}/{len(WAVE_CONFIGS)}',
+            text=f'Wave: {self.wave_progress_text()}',
             manager=self.gui_manager,
             container=self.stats_panel,
             object_id=pygame_gui.core.ObjectID(
@@ -274,76 +310,85 @@ class Game:
         
         self.wave_info_label = pygame_gui.elements.UILabel(
             relative_rect=pygame.Rect((10, 10), (280, 30)),
-            text=f'Wave {self.wave}/{len(WAVE_CONFIGS)}',
+            text=f'Wave {self.wave_progress_text()}',
             manager=self.gui_manager,
             container=self.wave_info_panel,
             object_id=pygame_gui.core.ObjectID(class_id='@stats_labels')
         )
     
-    def generate_path_points(self):
-        """Generate all points along the path for smooth enemy movement"""
-        points = []
-        for i in range(len(PATH_WAYPOINTS) - 1):
-            start = PATH_WAYPOINTS[i]
-            end = PATH_WAYPOINTS[i + 1]
-            
-            # Generate points between waypoints
-            if start[0] == end[0]:  # Vertical line
-                step = 1 if end[1] > start[1] else -1
-                for y in range(start[1], end[1] + step, step):
-                    if 0 <= y < GRID_HEIGHT and 0 <= start[0] < GRID_WIDTH:
-                        points.append((start[0], y))
-            else:  # Horizontal line
-                step = 1 if end[0] > start[0] else -1
-                for x in range(start[0], end[0] + step, step):
-                    if 0 <= x < GRID_WIDTH and 0 <= start[1] < GRID_HEIGHT:
-                        points.append((x, start[1]))
-        
-        return points
-    
-    def mark_path_on_grid(self):
-        """Mark the path on the grid"""
-        for x, y in self.path_points:
-            if 0 <= y < len(self.grid) and 0 <= x < len(self.grid[0]):
-                self.grid[y][x] = 2
-    
-    def spawn_enemy(self, enemy_type):
-        from ..entities.enemy import Enemy
-        # Get current wave config
-        wave_config = WAVE_CONFIGS[self.wave - 1]
-        
-        # Convert grid coordinates to pixels for starting position
-        start_pos = (PATH_WAYPOINTS[0][0] * TILE_SIZE + TILE_SIZE // 2,
-                    PATH_WAYPOINTS[0][1] * TILE_SIZE + TILE_SIZE // 2)
-        
-        # Create enemy with wave scaling
-        enemy = Enemy(enemy_type, self.path_points, {
-            'health_scale': wave_config['health_scale'],
-            'speed_scale': wave_config['speed_scale']
-        })
-        self.enemies.add(enemy)
-    
-    def wave_completed(self):
-        # Give bonus money for completing wave
-        # In BTD, end of round bonus is typically $100 for early rounds,
-        # increasing by small amounts each round
-        bonus = 100 + (self.wave * 10)  # Start at 100, increase by 10 per wave
-        self.money += bonus
-        
-        # Enable start wave button if not on last wave
-        if self.wave < len(WAVE_CONFIGS):
+    def wave_progress_text(self):
+        if self.waves.endless:
+            return f'{self.wave} (endless)'
+        return f'{self.wave}/{self.waves.wave_count}'
+    
+    def refresh_hud(self):
+        """Bring every HUD element up to date, e.g. after loading a game"""
+        self.on_money_changed(None, self.money)
+        self.on_lives_changed(None, self.lives)
+        self.update_hud()
+        self.on_wave_changed()
+    
+    def on_money_changed(self, old, new):
+        # Money can change many times a frame at high game speeds; update_hud shows it once
+        self.hud_money = new
+        self.hud_dirty = True
+    
+    def on_lives_changed(self, old, new):
+        self.hud_lives = new
+        self.hud_dirty = True
+    
+    def update_hud(self):
+        """Show the money and lives recorded since the last frame"""
+        if self.hud_money is not None:
+            self.money_label.set_text(f'Money: ${self.hud_money}')
+            self.update_tower_buttons()  # Affordability only changes with money
+            self.hud_money = None
+        if self.hud_lives is not None:
+            self.lives_label.set_text(f'Lives: {self.hud_lives}')
+            self.hud_lives = None
+    
+    def on_wave_changed(self, *args):
+        self.wave_label.set_text(f'Wave: {self.wave_progress_text()}')
+        self.wave_info_label.set_text(f'Wave {self.wave_progress_text()}')
+        
+        # Start wave button offers the next wave, if there is one
+        if self.wave_manager.wave_in_progress:
+            self.start_wave_button.disable()
+            self.start_wave_button.set_text('Wave in Progress...')
+        elif self.waves.has_wave(self.wave_manager.current_wave):
             self.start_wave_button.enable()
             self.start_wave_button.set_text('Start Wave')  # Reset button text
         else:
             self.start_wave_button.disable()
             self.start_wave_button.set_text('Game Complete!')
-        
-        # Update tower buttons with new money amount
-        self.update_tower_buttons()
+        self.hud_dirty = True
+    
+    def on_tower_placed(self, tower):
+        self.background_dirty = True
+        self.scene_dirty = True
+    
+    def on_tower_sold(self, tower, refund):
+        self.background_dirty = True
+        self.scene_dirty = True
+        if tower is self.selected_existing_tower:
+            self.selected_existing_tower = None
+            self.sell_button.hide()
     
     def handle_events(self):
         time_delta = self.clock.tick(FPS)/1000.0
         
+        with self.profiler.phase('events'):
+            self.process_events()
+        
+        # Update game state in fixed ticks, as many as the game speed calls for
+        self.advance_simulation(time_delta)
+        self.update_hud()
+        
+        # Update UI with unscaled time (UI should remain at normal speed)
+        with self.profiler.phase('gui_update'):
+            self.gui_manager.update(time_delta)
+    
+    def process_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
@@ -351,21 +396,13 @@ class Game:
             if event.type == pygame.USEREVENT:
                 if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
                     if event.ui_element == self.start_wave_button:
-                        if self.wave_manager.start_wave():
-                            self.start_wave_button.disable()
-                            self.start_wave_button.set_text('Wave in Progress...')
-                            self.wave += 1  # Increment wave counter when wave starts
-                            self.wave_info_label.set_text(f'Wave {self.wave}/{len(WAVE_CONFIGS)}')
+                        self.start_wave()
                     elif event.ui_element == self.sell_button and self.selected_existing_tower:
                         self.sell_tower(self.selected_existing_tower)
                     elif event.ui_element == self.fast_forward_button:
-                        # Toggle game speed
-                        if self.game_speed == NORMAL_GAME_SPEED:
-                            self.game_speed = FAST_FORWARD_SPEED
-                            self.fast_forward_button.set_text('Normal Speed (1x)')
-                        else:
-                            self.game_speed = NORMAL_GAME_SPEED
-                            self.fast_forward_button.set_text('Fast Forward (2x)')
+                        # Cycle through the game speeds
+                        index = GAME_SPEEDS.index(self.game_speed)
+                        self.set_game_speed(GAME_SPEEDS[(index + 1) % len(GAME_SPEEDS)])
                     elif event.ui_element == self.info_close_button:
                         self.info_panel.hide()
                         self.info_close_button.hide()
@@ -385,6 +422,16 @@ class Game:
                                     self.selected_tower = tower_type
                                 break
             
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    self.toggle_profiler()
+                elif event.key == pygame.K_F4 and self.profiler.frames:
+                    self.profiler.dump(PROFILER_DUMP_DIR)
+                elif event.key == pygame.K_F5:
+                    self.quicksave()
+                elif event.key == pygame.K_F9 and os.path.exists(SNAPSHOT_FILE):
+                    self.quickload()
+            
             # Right click to cancel tower placement
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 3:  # Right click
@@ -398,50 +445,100 @@ class Game:
                         else:  # Selecting existing tower
                             self.handle_tower_selection(event.pos)
             
-            self.gui_manager.process_events(event)
-        
-        # Apply game speed to time_delta for game logic updates
-        scaled_time_delta = time_delta * self.game_speed
-        
-        # Update game state with scaled time
-        self.wave_manager.update(scaled_time_delta)
-        for enemy in self.enemies:
-            enemy.update(scaled_time_delta)
-        for tower in self.towers:
-            tower.update(self.enemies, self.projectiles, scaled_time_delta)
-        for projectile in self.projectiles:
-            projectile.update(scaled_time_delta)
+            if self.gui_manager.process_events(event) or event.type == pygame.USEREVENT:
+                self.gui_dirty = True
+    
+    def quicksave(self):
+        os.makedirs(os.path.dirname(SNAPSHOT_FILE) or '.', exist_ok=True)
+        write_snapshot(SNAPSHOT_FILE, self)
+    
+    def quickload(self):
+        try:
+            read_snapshot(SNAPSHOT_FILE, self)
+        except SnapshotError:
+            return False
+        
+        # The input log no longer starts from a fresh game, so it can't be replayed
+        self.recorder = None
+        
+        # Nothing drawn or selected before the load is valid any more
+        self.previous_centers = {}
+        self.background_dirty = True
+        self.scene_dirty = True
+        self.gui_dirty = True
+        self.selected_tower = None
+        self.selected_existing_tower = None
+        self.sell_button.hide()
+        self.refresh_hud()
+        return True
+    
+    def toggle_profiler(self):
+        self.show_profiler = not self.show_profiler
+        self.profiler.set_enabled(self.show_profiler)
+        self.scene_dirty = True  # Clear the overlay in dirty-rect mode
+    
+    def set_game_speed(self, speed):
+        self.game_speed = speed
+        if self.recorder is not None:
+            self.recorder.record(self.tick, 'speed', speed)
+        
+        # The button offers the next speed in the cycle
+        next_speed = GAME_SPEEDS[(GAME_SPEEDS.index(speed) + 1) % len(GAME_SPEEDS)]
+        if next_speed is None:
+            self.fast_forward_button.set_text('Uncapped Speed')
+        elif next_speed == NORMAL_GAME_SPEED:
+            self.fast_forward_button.set_text('Normal Speed (1x)')
+        else:
+            self.fast_forward_button.set_text(f'Fast Forward ({next_speed:g}x)')
+    
+    def advance_simulation(self, time_delta):
+        """Run whole logic ticks for time_delta seconds of real time at the current game speed.
+        
+        Every tick has the same length, so the outcome doesn't depend on the
+        frame rate or the speed multiplier. An uncapped speed runs as many
+        ticks as fit in one frame's time budget.
+        """
+        tick_time = 1.0 / LOGIC_TICK_RATE
+        
+        if self.game_speed is None:
+            # Drawn at the latest tick, so no interpolation state is needed
+            deadline = time.perf_counter() + 1.0 / FPS
+            self.step(tick_time)
+            while time.perf_counter() < deadline:
+                self.step(tick_time)
+            self.tick_accumulator = 0.0
+            self.previous_centers = {}
+            self.render_alpha = 1.0
+            return
         
-        # Check projectile hits
+        self.tick_accumulator += min(time_delta, MAX_FRAME_TIME) * self.game_speed
+        ticks = int(self.tick_accumulator / tick_time)
+        self.tick_accumulator -= ticks * tick_time
+        for i in range(ticks):
+            # Only the last tick's starting positions are needed for interpolation
+            if i == ticks - 1:
+                self.store_previous_centers()
+            self.step(tick_time)
+        self.render_alpha = self.tick_accumulator / tick_time
+    
+    def store_previous_centers(self):
+        centers = {enemy: enemy.rect.center for enemy in self.enemies}
         for projectile in self.projectiles:
-            for enemy in self.enemies:
-                if projectile.rect.colliderect(enemy.rect):
-                    if enemy.take_damage(projectile.damage):
-                        # Find the tower that shot this projectile
-                        for tower in self.towers:
-                            if tower.rect.center == projectile.initial_pos:
-                                tower.enemies_defeated += 1
-                                tower.damage_dealt += enemy.stats['health']
-                                break
-                        self.money += enemy.reward
-                        enemy.kill()
-                    projectile.kill()
-                    break
-        
-        # Check if enemies reached the end
-        for enemy in self.enemies:
-            if enemy.reached_end or enemy.path_index >= len(enemy.path_points) - 1:
-                self.lives -= enemy.stats['damage']
-                enemy.kill()
-        
-        # Update UI with unscaled time (UI should remain at normal speed)
-        self.gui_manager.update(time_delta)
-        self.money_label.set_text(f'Money: ${self.money}')
-        self.lives_label.set_text(f'Lives: {self.lives}')
-        self.wave_label.set_text(f'Wave: {self.wave}/{len(WAVE_CONFIGS)}')
-        
-        # Update tower buttons based on money
-        self.update_tower_buttons()
+            centers[projectile] = projectile.rect.center
+        self.previous_centers = centers
+    
+    def render_rect(self, sprite):
+        """Return where to draw a moving sprite, interpolated between the last two ticks"""
+        rect = sprite.rect
+        previous = self.previous_centers.get(sprite)
+        if previous is None:
+            return rect
+        alpha = self.render_alpha
+        x = previous[0] + (rect.centerx - previous[0]) * alpha
+        y = previous[1] + (rect.centery - previous[1]) * alpha
+        rect = rect.copy()
+        rect.center = (int(x), int(y))
+        return rect
     
     def handle_mouse_click(self, pos):
         # Only handle clicks if a tower is selected
@@ -452,17 +549,8 @@ class Game:
         grid_x = pos[0] // TILE_SIZE
         grid_y = pos[1] // TILE_SIZE
         
-        # Check if we can place a tower here
-        if (grid_y < len(self.grid) and grid_x < len(self.grid[0]) and
-            self.money >= TOWER_TYPES[self.selected_tower]['cost'] and 
-            self.grid[grid_y][grid_x] == 0):
-            # Place tower
-            tower = Tower(self.selected_tower, 
-                         (grid_x * TILE_SIZE + TILE_SIZE // 2, 
-                          grid_y * TILE_SIZE + TILE_SIZE // 2))
-            self.towers.add(tower)
-            self.money -= TOWER_TYPES[self.selected_tower]['cost']
-            self.grid[grid_y][grid_x] = 1
+        # Place tower if the cell is free and we can afford it
+        if self.place_tower(self.selected_tower, grid_x, grid_y):
             self.selected_tower = None  # Deselect tower after placing
     
     def handle_tower_selection(self, pos):
@@ -489,26 +577,6 @@ class Game:
         else:
             self.sell_button.hide()
     
-    def sell_tower(self, tower):
-        # Calculate refund (70% of original cost)
-        refund = int(TOWER_TYPES[tower.type]['cost'] * 0.7)
-        self.money += refund
-        
-        # Get grid position
-        grid_x = tower.rect.centerx // TILE_SIZE
-        grid_y = tower.rect.centery // TILE_SIZE
-        
-        # Clear grid position
-        self.grid[grid_y][grid_x] = 0
-        
-        # Remove tower
-        tower.kill()
-        self.selected_existing_tower = None
-        self.sell_button.hide()
-        
-        # Update tower buttons
-        self.update_tower_buttons()
-    
     def draw_grid(self):
         # Draw the base grid
         for y in range(GRID_HEIGHT):
@@ -517,56 +585,61 @@ class Game:
                                  TILE_SIZE, TILE_SIZE)
                 
                 # Draw path
-                if self.grid[y][x] == 2:
+                if self.tile(x, y) == TILE_PATH:
                     pygame.draw.rect(self.screen, BROWN, rect)
                 
                 # Draw grid lines
                 pygame.draw.rect(self.screen, GRAY, rect, 1)
     
     def draw(self):
-        # Clear screen and surfaces
-        self.screen.fill(BLACK)
-        self.glow_surface.fill((0, 0, 0, 0))
+        if self.dirty_rect_rendering:
+            self.draw_dirty()
+            return
         
-        # Draw grid with tech effect
-        self.draw_tech_grid()
+        profiler = self.profiler
         
-        # Draw tower glows
-        if GLOW_EFFECT:
-            for tower in self.towers:
-                glow_color = TOWER_GLOW_COLORS[tower.type]
-                glow_surf = pygame.Surface((GLOW_RADIUS * 2, GLOW_RADIUS * 2), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surf, glow_color, 
-                                 (GLOW_RADIUS, GLOW_RADIUS), GLOW_RADIUS)
-                self.glow_surface.blit(glow_surf, 
-                                     (tower.rect.centerx - GLOW_RADIUS,
-                                      tower.rect.centery - GLOW_RADIUS),
-                                     special_flags=pygame.BLEND_ALPHA_SDL2)
-        
-        # Draw tower ranges (only for selected towers)
-        for tower in self.towers:
-            tower.draw_range(self.screen)
+        # Draw grid with tech effect (opaque, so it also clears the screen)
+        with profiler.phase('draw_tech_grid'):
+            self.draw_tech_grid()
         
-        # Draw game objects
-        self.towers.draw(self.screen)
-        self.enemies.draw(self.screen)
-        self.projectiles.draw(self.screen)
+        with profiler.phase('sprites'):
+            # Draw tower ranges (only for selected towers)
+            for tower in self.towers:
+                tower.draw_range(self.screen)
+            
+            # Draw game objects, moving ones interpolated between logic ticks
+            self.towers.draw(self.screen)
+            enemy_rects = [(enemy, self.render_rect(enemy)) for enemy in self.enemies]
+            for enemy, rect in enemy_rects:
+                self.screen.blit(enemy.image, rect)
+            for projectile in self.projectiles:
+                self.screen.blit(projectile.image, self.render_rect(projectile))
+            
+            # Draw enemy health bars
+            for enemy, rect in enemy_rects:
+                enemy.draw_health_bar(self.screen, rect)
         
-        # Draw enemy health bars and glows
-        for enemy in self.enemies:
+        with profiler.phase('glow'):
+            # Clear glow surface
+            self.glow_surface.fill((0, 0, 0, 0))
+            
+            # Draw tower and enemy glows
             if GLOW_EFFECT:
-                glow_color = ENEMY_GLOW_COLORS[enemy.type]
-                glow_surf = pygame.Surface((GLOW_RADIUS * 2, GLOW_RADIUS * 2), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surf, glow_color, 
-                                 (GLOW_RADIUS, GLOW_RADIUS), GLOW_RADIUS)
-                self.glow_surface.blit(glow_surf, 
-                                     (enemy.rect.centerx - GLOW_RADIUS,
-                                      enemy.rect.centery - GLOW_RADIUS),
-                                     special_flags=pygame.BLEND_ALPHA_SDL2)
-            enemy.draw_health_bar(self.screen)
-        
-        # Apply glow surface
-        self.screen.blit(self.glow_surface, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
+                for tower in self.towers:
+                    glow_surf = self.asset_manager.get_glow(TOWER_GLOW_COLORS[tower.type], GLOW_RADIUS)
+                    self.glow_surface.blit(glow_surf, 
+                                         (tower.rect.centerx - GLOW_RADIUS,
+                                          tower.rect.centery - GLOW_RADIUS),
+                                         special_flags=pygame.BLEND_ALPHA_SDL2)
+                for enemy, rect in enemy_rects:
+                    glow_surf = self.asset_manager.get_glow(ENEMY_GLOW_COLORS[enemy.type], GLOW_RADIUS)
+                    self.glow_surface.blit(glow_surf, 
+                                         (rect.centerx - GLOW_RADIUS,
+                                          rect.centery - GLOW_RADIUS),
+                                         special_flags=pygame.BLEND_ALPHA_SDL2)
+            
+            # Apply glow surface
+            self.screen.blit(self.glow_surface, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
         
         # Draw tower placement preview with glow
         if self.selected_tower:
@@ -581,9 +654,7 @@ class Game:
             )
             
             # Color based on whether placement is valid
-            can_place = (grid_y < len(self.grid) and grid_x < len(self.grid[0]) and
-                        self.money >= TOWER_TYPES[self.selected_tower]['cost'] and
-                        self.grid[grid_y][grid_x] == 0 and
+            can_place = (self.can_place_tower(self.selected_tower, grid_x, grid_y) and
                         not self.game_panel.get_abs_rect().collidepoint(mouse_pos))
             
             color = GREEN if can_place else RED
@@ -592,12 +663,10 @@ class Game:
             # Draw range preview with glow
             range_radius = TOWER_TYPES[self.selected_tower]['range']
             if GLOW_EFFECT:
-                glow_surf = pygame.Surface((range_radius * 2 + 20, range_radius * 2 + 20), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surf, (*color, 30), 
-                                 (range_radius + 10, range_radius + 10), range_radius)
+                glow_surf = self.asset_manager.get_glow((*color, 30), range_radius)
                 self.screen.blit(glow_surf, 
-                               (grid_x * TILE_SIZE + TILE_SIZE // 2 - range_radius - 10,
-                                grid_y * TILE_SIZE + TILE_SIZE // 2 - range_radius - 10),
+                               (grid_x * TILE_SIZE + TILE_SIZE // 2 - range_radius,
+                                grid_y * TILE_SIZE + TILE_SIZE // 2 - range_radius),
                                special_flags=pygame.BLEND_ALPHA_SDL2)
             pygame.draw.circle(self.screen, color, 
                              (grid_x * TILE_SIZE + TILE_SIZE // 2,
@@ -609,8 +678,33 @@ class Game:
             self.draw_tower_stats(self.selected_existing_tower)
         
         # Draw GUI
-        self.gui_manager.draw_ui(self.screen)
-        pygame.display.flip()
+        with profiler.phase('draw_ui'):
+            self.gui_manager.draw_ui(self.screen)
+        if self.show_profiler:
+            self.draw_profiler_overlay()
+        with profiler.phase('flip'):
+            pygame.display.flip()
+    
+    def draw_profiler_overlay(self):
+        """Draw rolling per-phase frame timings in the bottom-left corner. Returns the box Rect."""
+        rows = [('phase', 'p50', 'p99')]
+        for name, stats in self.profiler.summary().items():
+            rows.append((name, f"{stats['p50']:.2f}", f"{stats['p99']:.2f}"))
+        
+        line_height = 16
+        padding = 6
+        box_height = len(rows) * line_height + padding * 2
+        box = pygame.Rect(4, WINDOW_HEIGHT - box_height - 4, 200, box_height)
+        overlay = pygame.Surface(box.size, pygame.SRCALPHA)
+        overlay.fill((*UI_BACKGROUND, 200))
+        pygame.draw.rect(overlay, (*UI_ACCENT, 255), overlay.get_rect(), 1)
+        for i, row in enumerate(rows):
+            # Each column at its own x, the default font isn't monospaced
+            for x, text in zip((padding, padding + 110, padding + 150), row):
+                overlay.blit(self.asset_manager.render_text(text, 20, UI_TEXT),
+                             (x, padding + i * line_height))
+        self.screen.blit(overlay, box)
+        return box
     
     def draw_tower_stats(self, tower):
         # Create a stats box with improved styling
@@ -624,89 +718,263 @@ class Game:
         box_x = min(tower.rect.centerx + 20, WINDOW_WIDTH - box_width - 260)
         box_y = min(tower.rect.centery, WINDOW_HEIGHT - box_height)
         
-        # Draw semi-transparent background with border
-        stats_surface = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
-        pygame.draw.rect(stats_surface, (*UI_BACKGROUND, 230), 
-                        (0, 0, box_width, box_height))
-        pygame.draw.rect(stats_surface, (*UI_ACCENT, 255), 
-                        (0, 0, box_width, box_height), 2)
+        # Draw semi-transparent background with border (built once per box size)
+        stats_surface = self.tower_stats_box
+        if stats_surface is None or stats_surface.get_size() != (box_width, box_height):
+            stats_surface = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
+            pygame.draw.rect(stats_surface, (*UI_BACKGROUND, 230), 
+                            (0, 0, box_width, box_height))
+            pygame.draw.rect(stats_surface, (*UI_ACCENT, 255), 
+                            (0, 0, box_width, box_height), 2)
+            self.tower_stats_box = stats_surface
         self.screen.blit(stats_surface, (box_x, box_y))
         
-        # Draw stats text with improved font
-        font = pygame.font.Font(None, 26)  # Increased font size
+        # Draw stats text with improved font, lines are only rendered when they change
         for i, text in enumerate(stats_text):
-            text_surface = font.render(text, True, UI_TEXT)
+            text_surface = self.asset_manager.render_text(text, 26, UI_TEXT)  # Increased font size
             self.screen.blit(text_surface, 
                            (box_x + padding, 
                             box_y + padding + i * line_height))
+        
+        return pygame.Rect(box_x, box_y, box_width, box_height)
     
-    def draw_tech_grid(self):
-        # Create surface for grid
-        grid_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+    def build_background_layers(self):
+        """Bake the path tiles and grid lines into the cached background surfaces"""
+        self.path_surface.fill((0, 0, 0, 0))
+        self.grid_surface.fill((0, 0, 0, 0))
         
-        # Update path pulse
-        self.path_pulse_value = (self.path_pulse_value + PATH_PULSE_SPEED) % (2 * math.pi)
-        pulse_alpha = int((PATH_PULSE_MAX - PATH_PULSE_MIN) * 
-                         (math.sin(self.path_pulse_value) * 0.5 + 0.5) + PATH_PULSE_MIN * 255)
+        # Path glow is the same for every tile, so draw it once
+        glow_surf = pygame.Surface((TILE_SIZE * 2, TILE_SIZE * 2), pygame.SRCALPHA)
+        pygame.draw.rect(glow_surf, (*BROWN, 30), 
+                       (TILE_SIZE//2, TILE_SIZE//2, TILE_SIZE, TILE_SIZE))
         
-        # Draw base grid with tech effect
+        path_rects = []
         for y in range(GRID_HEIGHT):
             for x in range(GRID_WIDTH):
+                tile = self.tile(x, y)
                 rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, 
                                  TILE_SIZE, TILE_SIZE)
                 
-                # Draw path with tech effect and glow
-                if self.grid[y][x] == 2:
-                    # Draw base path
-                    path_color = (*BROWN, pulse_alpha)
-                    pygame.draw.rect(grid_surface, path_color, rect)
-                    
-                    # Add circuit pattern
-                    pygame.draw.line(grid_surface, (*BROWN, pulse_alpha),
-                                   (rect.left + 2, rect.centery),
-                                   (rect.right - 2, rect.centery), 2)
-                    pygame.draw.line(grid_surface, (*BROWN, pulse_alpha),
-                                   (rect.centerx, rect.top + 2),
-                                   (rect.centerx, rect.bottom - 2), 2)
-                    
-                    # Add glow effect
-                    if PATH_GLOW:
-                        glow_surf = pygame.Surface((TILE_SIZE * 2, TILE_SIZE * 2), pygame.SRCALPHA)
-                        pygame.draw.rect(glow_surf, (*BROWN, 30), 
-                                       (TILE_SIZE//2, TILE_SIZE//2, TILE_SIZE, TILE_SIZE))
-                        grid_surface.blit(glow_surf, 
-                                        (rect.x - TILE_SIZE//2, rect.y - TILE_SIZE//2),
-                                        special_flags=pygame.BLEND_ALPHA_SDL2)
+                # Tiles the map doesn't allow building on are shaded out
+                if tile == TILE_BLOCKED:
+                    self.grid_surface.fill((*BLACK, 120), rect)
+                if tile != TILE_PATH:
+                    continue
+                path_rects.append(rect)
+                
+                # Draw base path at full opacity, the pulse is applied when blitting
+                pygame.draw.rect(self.path_surface, BROWN, rect)
                 
-                # Draw subtle grid lines
-                pygame.draw.rect(grid_surface, (*GRID_LINE_COLOR, int(255 * GRID_OPACITY)), 
-                               rect, 1)
+                # Add circuit pattern
+                pygame.draw.line(self.path_surface, BROWN,
+                               (rect.left + 2, rect.centery),
+                               (rect.right - 2, rect.centery), 2)
+                pygame.draw.line(self.path_surface, BROWN,
+                               (rect.centerx, rect.top + 2),
+                               (rect.centerx, rect.bottom - 2), 2)
+                
+                # Add glow effect around the tile
+                if PATH_GLOW:
+                    self.grid_surface.blit(glow_surf, 
+                                         (rect.x - TILE_SIZE//2, rect.y - TILE_SIZE//2),
+                                         special_flags=pygame.BLEND_ALPHA_SDL2)
+        
+        # Glow only shows around the path, not on top of it
+        for rect in path_rects:
+            self.grid_surface.fill((0, 0, 0, 0), rect)
+        
+        # Draw subtle grid lines
+        line_color = (*GRID_LINE_COLOR, int(255 * GRID_OPACITY))
+        for y in range(GRID_HEIGHT):
+            for x in range(GRID_WIDTH):
+                pygame.draw.rect(self.grid_surface, line_color,
+                               (x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE), 1)
+        
+        self.background_dirty = False
+        self.background_alpha = None
+    
+    def update_background(self):
+        """Advance the path pulse and recomposite the background if it changed.
+        
+        Returns True when background_surface was redrawn.
+        """
+        if self.background_dirty:
+            self.build_background_layers()
+        
+        # Update path pulse
+        self.path_pulse_value = (self.path_pulse_value + PATH_PULSE_SPEED) % (2 * math.pi)
+        pulse_alpha = int((PATH_PULSE_MAX - PATH_PULSE_MIN) * 
+                         (math.sin(self.path_pulse_value) * 0.5 + 0.5) + PATH_PULSE_MIN * 255)
+        
+        # Pulse the whole path layer with a single alpha modulation
+        if pulse_alpha == self.background_alpha:
+            return False
+        self.path_surface.set_alpha(pulse_alpha)
+        self.background_surface.fill(BLACK)
+        self.background_surface.blit(self.path_surface, (0, 0))
+        self.background_surface.blit(self.grid_surface, (0, 0))
+        self.background_alpha = pulse_alpha
+        return True
+    
+    def draw_tech_grid(self):
+        self.update_background()
+        self.screen.blit(self.background_surface, (0, 0))
         
         # Draw hover effect
         if self.selected_tower:
             mouse_pos = pygame.mouse.get_pos()
             grid_x = mouse_pos[0] // TILE_SIZE
             grid_y = mouse_pos[1] // TILE_SIZE
-            hover_rect = pygame.Rect(grid_x * TILE_SIZE, grid_y * TILE_SIZE,
-                                   TILE_SIZE, TILE_SIZE)
-            pygame.draw.rect(grid_surface, GRID_HOVER_COLOR, hover_rect)
+            self.screen.blit(self.hover_surface, (grid_x * TILE_SIZE, grid_y * TILE_SIZE))
+    
+    def draw_dirty(self):
+        """Draw only what moved since the last frame and present just those regions.
+        
+        The background, tower glows and towers are baked into scene_surface;
+        each frame the previous frame's dirty rects are restored from it, the
+        moving parts are drawn on top, and only the touched rects are sent to
+        the display with pygame.display.update.
+        """
+        screen_rect = self.screen.get_rect()
+        
+        profiler = self.profiler
+        
+        # Rebuild the static scene when the grid, towers or path pulse changed
+        with profiler.phase('draw_tech_grid'):
+            full_refresh = self.update_background() or self.scene_dirty
+            if full_refresh:
+                self.scene_surface.blit(self.background_surface, (0, 0))
+                for tower in self.towers:
+                    if GLOW_EFFECT:
+                        glow_surf = self.asset_manager.get_glow(TOWER_GLOW_COLORS[tower.type], GLOW_RADIUS)
+                        self.scene_surface.blit(glow_surf, 
+                                              (tower.rect.centerx - GLOW_RADIUS,
+                                               tower.rect.centery - GLOW_RADIUS),
+                                              special_flags=pygame.BLEND_ALPHA_SDL2)
+                self.towers.draw(self.scene_surface)
+                self.scene_dirty = False
+        
+        # GUI changes (clicks, hover highlights, tooltips) can appear anywhere,
+        # so present the whole screen while the GUI is active and one frame after
+        gui_active = self.gui_dirty or self.gui_manager.get_hovering_any_element()
+        full_refresh = full_refresh or gui_active or self.gui_was_active
+        self.gui_was_active = gui_active
+        self.gui_dirty = False
+        
+        # Restore the static scene under everything drawn last frame
+        if full_refresh:
+            self.screen.blit(self.scene_surface, (0, 0))
+        else:
+            for rect in self.previous_dirty_rects:
+                self.screen.blit(self.scene_surface, rect, rect)
+        
+        dirty_rects = []
         
-        self.screen.blit(grid_surface, (0, 0))
+        # Selected tower range and target line
+        for tower in self.towers:
+            if tower.selected:
+                tower.draw_range(self.screen)
+                dirty_rects.append(pygame.Rect(tower.rect.centerx - tower.range - 1,
+                                               tower.rect.centery - tower.range - 1,
+                                               tower.range * 2 + 2, tower.range * 2 + 2))
+        
+        with profiler.phase('sprites'):
+            # Enemies with their glows and health bars, interpolated between logic ticks
+            for enemy in self.enemies:
+                rect = self.render_rect(enemy)
+                self.screen.blit(enemy.image, rect)
+                glow_rect = pygame.Rect(rect.centerx - GLOW_RADIUS,
+                                        rect.centery - GLOW_RADIUS,
+                                        GLOW_RADIUS * 2, GLOW_RADIUS * 2)
+                if GLOW_EFFECT:
+                    glow_surf = self.asset_manager.get_glow(ENEMY_GLOW_COLORS[enemy.type], GLOW_RADIUS)
+                    self.screen.blit(glow_surf, glow_rect, special_flags=pygame.BLEND_ALPHA_SDL2)
+                enemy.draw_health_bar(self.screen, rect)
+                dirty_rects.append(glow_rect.union(rect.inflate(8, 20)))
+            
+            # Projectiles
+            for projectile in self.projectiles:
+                rect = self.render_rect(projectile)
+                self.screen.blit(projectile.image, rect)
+                dirty_rects.append(rect.copy())
+        
+        # Tower placement preview
+        if self.selected_tower:
+            mouse_pos = pygame.mouse.get_pos()
+            grid_x = mouse_pos[0] // TILE_SIZE
+            grid_y = mouse_pos[1] // TILE_SIZE
+            center = (grid_x * TILE_SIZE + TILE_SIZE // 2, grid_y * TILE_SIZE + TILE_SIZE // 2)
+            self.screen.blit(self.hover_surface, (grid_x * TILE_SIZE, grid_y * TILE_SIZE))
+            
+            can_place = (self.can_place_tower(self.selected_tower, grid_x, grid_y) and
+                        not self.game_panel.get_abs_rect().collidepoint(mouse_pos))
+            color = GREEN if can_place else RED
+            pygame.draw.rect(self.screen, color,
+                           (grid_x * TILE_SIZE, grid_y * TILE_SIZE, TILE_SIZE, TILE_SIZE), 2)
+            
+            range_radius = TOWER_TYPES[self.selected_tower]['range']
+            if GLOW_EFFECT:
+                glow_surf = self.asset_manager.get_glow((*color, 30), range_radius)
+                self.screen.blit(glow_surf, 
+                               (center[0] - range_radius, center[1] - range_radius),
+                               special_flags=pygame.BLEND_ALPHA_SDL2)
+            pygame.draw.circle(self.screen, color, center, range_radius, 2)
+            dirty_rects.append(pygame.Rect(center[0] - range_radius - 1, center[1] - range_radius - 1,
+                                           range_radius * 2 + 2, range_radius * 2 + 2)
+                               .union((grid_x * TILE_SIZE, grid_y * TILE_SIZE, TILE_SIZE, TILE_SIZE)))
+        
+        # Selected tower stats box
+        if self.selected_existing_tower:
+            dirty_rects.append(self.draw_tower_stats(self.selected_existing_tower))
+        
+        # The HUD panels only need presenting when their numbers change
+        if self.hud_dirty:
+            dirty_rects.append(self.game_panel.get_abs_rect())
+            dirty_rects.append(self.wave_info_panel.get_abs_rect())
+            self.hud_dirty = False
+        
+        with profiler.phase('draw_ui'):
+            self.gui_manager.draw_ui(self.screen)
+        if self.show_profiler:
+            dirty_rects.append(self.draw_profiler_overlay())
+        
+        dirty_rects = [rect.clip(screen_rect) for rect in dirty_rects]
+        with profiler.phase('flip'):
+            if full_refresh:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.previous_dirty_rects + dirty_rects)
+        self.previous_dirty_rects = dirty_rects
     
     def run(self):
         while self.running:
             self.handle_events()
             self.draw()
+            self.profiler.end_frame()
         
-        pygame.quit() 
+        self.save_replay()
+        pygame.quit()
+    
+    def save_replay(self):
+        """Write this game's input log to REPLAY_DIR, returning the path"""
+        if self.recorder is None or not self.recorder.events:
+            return None
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        path = os.path.join(REPLAY_DIR, time.strftime('replay_%Y%m%d_%H%M%S.json'))
+        self.recorder.save(path, self)
+        return path
     
     def update_tower_buttons(self):
-        """Enable/disable tower buttons based on money"""
+        """Enable/disable tower buttons based on money, touching only those that change"""
         for tower_type, button in self.tower_buttons.items():
-            if self.money >= TOWER_TYPES[tower_type]['cost']:
+            affordable = self.money >= TOWER_TYPES[tower_type]['cost']
+            if self.tower_button_enabled.get(tower_type) == affordable:
+                continue
+            if affordable:
                 button.enable()
             else:
-                button.disable() 
+                button.disable()
+            self.tower_button_enabled[tower_type] = affordable
     
     def show_tower_info(self, tower_type):
         tower_info = TOWER_INFO[tower_type]
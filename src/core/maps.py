@@ -0,0 +1,260 @@
+"""Tile maps: loading, compiling and caching.
+
+A map is a JSON file in MAP_DIR named after the map, with "width",
+"height", "blocked" tiles where towers can't be built, and either "paths"
+(lists of waypoints joined by straight runs) or, for an open map, "spawns"
+and "exits" tiles that enemies cross around the towers (see flow_field.py).
+Compiled maps are cached on disk together with a hash of the source.
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from .settings import *
+from .path import PathTable
+
+# Occupancy values, one byte per tile
+TILE_EMPTY = 0
+TILE_TOWER = 1
+TILE_PATH = 2
+TILE_BLOCKED = 3
+
+CACHE_MAGIC = b'CTDM'
+CACHE_VERSION = 2
+
+_CACHE_HEADER = struct.Struct('<4sH20s')
+_CACHE_SIZE = struct.Struct('<HHH')
+_CACHE_ROUTE = struct.Struct('<I')
+
+
+class MapError(ValueError):
+    pass
+
+
+class GameMap:
+    """A compiled map, shared by every game played on it.
+
+    occupancy is the starting grid (each game works on its own copy) and
+    routes holds one PathTable per path, in file order. Open maps have no
+    routes but spawns and exits, lists of (x, y) tiles.
+    """
+
+    def __init__(self, name, title, width, height, occupancy, routes, spawns=(), exits=()):
+        self.name = name
+        self.title = title
+        self.width = width
+        self.height = height
+        self.occupancy = occupancy
+        self.routes = routes
+        self.spawns = list(spawns)
+        self.exits = list(exits)
+
+    @property
+    def open(self):
+        return not self.routes
+
+    def tile(self, grid_x, grid_y):
+        """Return the starting occupancy of a tile, or None outside the map"""
+        if 0 <= grid_x < self.width and 0 <= grid_y < self.height:
+            return self.occupancy[grid_y * self.width + grid_x]
+        return None
+
+
+def expand_waypoints(waypoints, width, height):
+    """Return every tile along the runs between waypoints, skipping tiles off the map"""
+    points = []
+    for i in range(len(waypoints) - 1):
+        start = waypoints[i]
+        end = waypoints[i + 1]
+        if start[0] != end[0] and start[1] != end[1]:
+            raise MapError(f"path from {tuple(start)} to {tuple(end)} is not horizontal or vertical")
+
+        # Generate points between waypoints
+        if start[0] == end[0]:  # Vertical line
+            step = 1 if end[1] > start[1] else -1
+            for y in range(start[1], end[1] + step, step):
+                if 0 <= y < height and 0 <= start[0] < width:
+                    points.append((start[0], y))
+        else:  # Horizontal line
+            step = 1 if end[0] > start[0] else -1
+            for x in range(start[0], end[0] + step, step):
+                if 0 <= x < width and 0 <= start[1] < height:
+                    points.append((x, start[1]))
+
+    return points
+
+
+def compile_map(data, name):
+    """Build a GameMap from a map file's parsed JSON"""
+    width = data.get('width', GRID_WIDTH)
+    height = data.get('height', GRID_HEIGHT)
+    if not 0 < width < 65536 or not 0 < height < 65536:
+        raise MapError(f"map '{name}' has an invalid size {width}x{height}")
+    paths = data.get('paths', [])
+    spawns = [tuple(tile) for tile in data.get('spawns', ())]
+    exits = [tuple(tile) for tile in data.get('exits', ())]
+    if not paths and not (spawns and exits):
+        raise MapError(f"map '{name}' needs paths, or spawns and exits")
+    if paths and (spawns or exits):
+        raise MapError(f"map '{name}' has both paths and spawns/exits")
+
+    occupancy = bytearray(width * height)
+    for x, y in data.get('blocked', ()):
+        if not (0 <= x < width and 0 <= y < height):
+            raise MapError(f"blocked tile ({x}, {y}) is outside map '{name}'")
+        occupancy[y * width + x] = TILE_BLOCKED
+
+    routes = []
+    for waypoints in paths:
+        points = expand_waypoints(waypoints, width, height)
+        if len(points) < 2:
+            raise MapError(f"a path of map '{name}' has fewer than two tiles on the map")
+        for x, y in points:
+            occupancy[y * width + x] = TILE_PATH
+        routes.append(PathTable(points))
+
+    # Spawns and exits of open maps are kept clear of towers like paths are
+    for x, y in spawns + exits:
+        if not (0 <= x < width and 0 <= y < height):
+            raise MapError(f"spawn or exit ({x}, {y}) is outside map '{name}'")
+        occupancy[y * width + x] = TILE_PATH
+
+    return GameMap(name, data.get('title', name), width, height, occupancy, routes, spawns, exits)
+
+
+def _column(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_cache(path, game_map, digest):
+    """Write a compiled map's tables to path, tagged with the digest of its source"""
+    parts = [_CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, digest),
+             _CACHE_SIZE.pack(game_map.width, game_map.height, len(game_map.routes)),
+             bytes(game_map.occupancy)]
+    for route in game_map.routes:
+        parts.append(_CACHE_ROUTE.pack(len(route.points)))
+        parts.append(_column('H', [x for x, y in route.points]))
+        parts.append(_column('H', [y for x, y in route.points]))
+        parts.append(_column('d', route.lengths))
+    for tiles in (game_map.spawns, game_map.exits):
+        parts.append(_CACHE_ROUTE.pack(len(tiles)))
+        parts.append(_column('H', [x for x, y in tiles]))
+        parts.append(_column('H', [y for x, y in tiles]))
+    title = game_map.title.encode('utf-8')
+    parts.append(_CACHE_ROUTE.pack(len(title)) + title)
+
+    # Written aside and renamed into place, so a crash mid-write can't leave a truncated cache behind
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path), suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_cache(path, name, digest):
+    """Return the GameMap cached at path, or None if it is missing or not for this source"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    try:
+        magic, version, cached_digest = _CACHE_HEADER.unpack_from(data)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or cached_digest != digest:
+            return None
+        offset = _CACHE_HEADER.size
+        width, height, route_count = _CACHE_SIZE.unpack_from(data, offset)
+        offset += _CACHE_SIZE.size
+        occupancy = bytearray(data[offset:offset + width * height])
+        if len(occupancy) != width * height:
+            return None
+        offset += width * height
+
+        def column(typecode, count):
+            nonlocal offset
+            values = array(typecode)
+            size = values.itemsize * count
+            values.frombytes(data[offset:offset + size])
+            if len(values) != count:
+                raise ValueError("truncated column")
+            if sys.byteorder == 'big':
+                values.byteswap()
+            offset += size
+            return values
+
+        routes = []
+        for _ in range(route_count):
+            count, = _CACHE_ROUTE.unpack_from(data, offset)
+            offset += _CACHE_ROUTE.size
+            xs = column('H', count)
+            ys = column('H', count)
+            lengths = column('d', count).tolist()
+            routes.append(PathTable(list(zip(xs.tolist(), ys.tolist())), lengths))
+        spawns_and_exits = []
+        for _ in range(2):
+            count, = _CACHE_ROUTE.unpack_from(data, offset)
+            offset += _CACHE_ROUTE.size
+            xs = column('H', count)
+            ys = column('H', count)
+            spawns_and_exits.append(list(zip(xs.tolist(), ys.tolist())))
+        length, = _CACHE_ROUTE.unpack_from(data, offset)
+        offset += _CACHE_ROUTE.size
+        if offset + length != len(data):
+            return None
+        title = data[offset:offset + length].decode('utf-8')
+    except (struct.error, ValueError):
+        return None  # Truncated or corrupt, compile from the source instead
+
+    return GameMap(name, title, width, height, occupancy, routes, *spawns_and_exits)
+
+
+def map_names(map_dir=MAP_DIR):
+    """Names of the maps available in map_dir"""
+    if not os.path.isdir(map_dir):
+        return []
+    return sorted(os.path.splitext(entry)[0] for entry in os.listdir(map_dir) if entry.endswith('.json'))
+
+
+def load_map(name, map_dir=MAP_DIR, cache_dir=MAP_CACHE_DIR):
+    """Load and compile map_dir/<name>.json, using the compiled copy in cache_dir when it is current"""
+    path = os.path.join(map_dir, name + '.json')
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+    except FileNotFoundError:
+        raise MapError(f"no map '{name}' in {map_dir}") from None
+
+    # The compiled tables also depend on the tile size and the default map size
+    key = struct.pack('<HHHH', CACHE_VERSION, TILE_SIZE, GRID_WIDTH, GRID_HEIGHT)
+    digest = hashlib.sha1(key + source).digest()
+    cache_path = os.path.join(cache_dir, name + '.mapc') if cache_dir else None
+    if cache_path:
+        game_map = read_cache(cache_path, name, digest)
+        if game_map is not None:
+            return game_map
+
+    try:
+        data = json.loads(source)
+    except ValueError as e:
+        raise MapError(f"map '{name}' is not valid JSON: {e}") from None
+    game_map = compile_map(data, name)
+
+    if cache_path:
+        try:
+            write_cache(cache_path, game_map, digest)
+        except OSError:
+            pass  # Read-only install, compile on every start instead
+    return game_map
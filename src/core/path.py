@@ -0,0 +1,99 @@
+import bisect
+import math
+from .settings import *
+
+class PathTable:
+    """Precomputed pixel-space path with a cumulative arc-length table.
+
+    An enemy's progress is a single float distance along the path; its
+    position is a table lookup plus a linear interpolation inside one
+    segment, and "furthest along" comparisons are exact.
+    """
+
+    def __init__(self, path_points, lengths=None):
+        self.points = path_points
+
+        # Tile centers in pixels
+        self.xs = [x * TILE_SIZE + TILE_SIZE // 2 for x, y in path_points]
+        self.ys = [y * TILE_SIZE + TILE_SIZE // 2 for x, y in path_points]
+
+        # lengths[i] is the distance from the start to point i; a compiled map passes its cached table
+        if lengths is None:
+            lengths = [0.0]
+            for i in range(1, len(path_points)):
+                segment = math.hypot(self.xs[i] - self.xs[i - 1], self.ys[i] - self.ys[i - 1])
+                lengths.append(lengths[-1] + segment)
+        self.lengths = lengths
+        self.total_length = self.lengths[-1]
+        self.last_index = len(path_points) - 1
+
+    def __len__(self):
+        return len(self.points)
+
+    def index_at(self, distance):
+        """Return the index of the path point at or just before distance"""
+        if distance <= 0:
+            return 0
+        if distance >= self.total_length:
+            return self.last_index
+        return bisect.bisect_right(self.lengths, distance) - 1
+
+    def locate(self, distance):
+        """Return (index, x, y): the path point at or before distance and the pixel position"""
+        index = self.index_at(distance)
+        if index >= self.last_index:
+            return self.last_index, self.xs[-1], self.ys[-1]
+
+        start = self.lengths[index]
+        segment = self.lengths[index + 1] - start
+        t = (distance - start) / segment if segment > 0 else 0.0
+        if t < 0:
+            t = 0.0
+        x = self.xs[index] + (self.xs[index + 1] - self.xs[index]) * t
+        y = self.ys[index] + (self.ys[index + 1] - self.ys[index]) * t
+        return index, x, y
+
+    def position(self, distance):
+        """Return the (x, y) pixel position at distance along the path"""
+        index, x, y = self.locate(distance)
+        return x, y
+
+    def coverage(self, center, radius):
+        """Return the (start, end) arc-length intervals of the path within radius of center, in path order"""
+        cx, cy = center
+        radius_sq = radius * radius
+        xs, ys, lengths = self.xs, self.ys, self.lengths
+        intervals = []
+        for i in range(self.last_index):
+            segment = lengths[i + 1] - lengths[i]
+            if segment <= 0:
+                continue
+
+            # Solve |start + t * (end - start) - center| = radius for t along the segment
+            x0, y0 = xs[i] - cx, ys[i] - cy
+            dx, dy = xs[i + 1] - xs[i], ys[i + 1] - ys[i]
+            a = dx * dx + dy * dy
+            b = 2 * (x0 * dx + y0 * dy)
+            c = x0 * x0 + y0 * y0 - radius_sq
+            disc = b * b - 4 * a * c
+            if disc <= 0:
+                continue
+            root = math.sqrt(disc)
+            t0 = max((-b - root) / (2 * a), 0.0)
+            t1 = min((-b + root) / (2 * a), 1.0)
+            if t0 >= t1:
+                continue
+
+            start = lengths[i] + t0 * segment
+            end = lengths[i] + t1 * segment
+            if intervals and start <= intervals[-1][1] + 1e-6:
+                intervals[-1] = (intervals[-1][0], end)  # Continues across the corner
+            else:
+                intervals.append((start, end))
+        return intervals
+
+    def within(self, center, radius):
+        """Whether the whole path lies strictly within radius of center"""
+        cx, cy = center
+        radius_sq = radius * radius
+        return all((x - cx) ** 2 + (y - cy) ** 2 < radius_sq for x, y in zip(self.xs, self.ys))
@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+
+class _Phase:
+    """Reusable timer for one named phase, added to the current frame on exit"""
+    __slots__ = ('totals', 'name', 'start')
+
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.totals[self.name] = self.totals.get(self.name, 0.0) + elapsed
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class FrameProfiler:
+    """Per-phase frame timings with rolling percentiles.
+
+    Wrap work in `with profiler.phase('name'):` and call `end_frame` once
+    per frame. A phase entered several times in one frame (e.g. once per
+    logic tick) is summed. While disabled, `phase` hands back a shared no-op
+    so the instrumentation costs next to nothing.
+    """
+
+    def __init__(self, enabled=False, window=300):
+        self.enabled = enabled
+        self.window = window
+        self.frames = deque(maxlen=window)  # {phase: seconds} per finished frame
+        self.phase_names = []  # In first-seen order, for stable reports
+        self.frame_count = 0
+        self._current = {}
+        self._phases = {}
+        self._frame_start = time.perf_counter()
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        timer = self._phases.get(name)
+        if timer is None:
+            timer = self._phases[name] = _Phase(self._current, name)
+            self.phase_names.append(name)
+        return timer
+
+    def end_frame(self):
+        now = time.perf_counter()
+        if self.enabled:
+            frame = dict(self._current)
+            frame['frame'] = now - self._frame_start
+            self.frames.append(frame)
+            self.frame_count += 1
+            self._current.clear()
+        self._frame_start = now
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._current.clear()
+        self._frame_start = time.perf_counter()
+
+    def reset(self):
+        self.frames.clear()
+        self.frame_count = 0
+        self._current.clear()
+
+    def percentile(self, name, q):
+        """q-th percentile (0-100) of a phase over the window, in milliseconds"""
+        values = sorted(frame.get(name, 0.0) for frame in self.frames)
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(q / 100.0 * len(values)))
+        return values[index] * 1000.0
+
+    def summary(self):
+        """{phase: {'mean', 'p50', 'p90', 'p99', 'max'}} in milliseconds"""
+        report = {}
+        count = len(self.frames)
+        for name in ['frame'] + self.phase_names:
+            values = [frame.get(name, 0.0) for frame in self.frames]
+            report[name] = {
+                'mean': sum(values) / count * 1000.0 if count else 0.0,
+                'p50': self.percentile(name, 50),
+                'p90': self.percentile(name, 90),
+                'p99': self.percentile(name, 99),
+                'max': max(values) * 1000.0 if values else 0.0,
+            }
+        return report
+
+    def dump_csv(self, path):
+        """Write one row per frame in the window, one column per phase (milliseconds)"""
+        columns = ['frame'] + self.phase_names
+        first = self.frame_count - len(self.frames)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['index'] + [f'{name}_ms' for name in columns])
+            for i, frame in enumerate(self.frames):
+                writer.writerow([first + i] + [f'{frame.get(name, 0.0) * 1000.0:.4f}' for name in columns])
+
+    def dump_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'frames': len(self.frames),
+                'summary': self.summary(),
+            }, f, indent=2)
+
+    def dump(self, directory):
+        """Write a timestamped CSV and JSON pair into directory, returning their paths"""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, time.strftime('profile_%Y%m%d_%H%M%S'))
+        self.dump_csv(stem + '.csv')
+        self.dump_json(stem + '.json')
+        return stem + '.csv', stem + '.json'
@@ -0,0 +1,89 @@
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+
+class ProgressIndex:
+    """Enemies of each route sorted by how far along it they are.
+
+    Marked stale whenever enemies move and only sorted again when a tower
+    first asks, so ticks where no tower is ready to fire cost nothing.
+    Within a route enemies are ordered furthest first, ties keeping their
+    spawn order, which is the order the spatial grid hands them to towers.
+    """
+
+    def __init__(self, routes):
+        self.route_ids = {path: index for index, path in enumerate(routes)}
+        self.enemies = None
+        self.store = None
+        self.stale = False
+
+        # Per route: negated distances (ascending for bisect) and the enemies in that order
+        self.keys = [[] for _ in routes]
+        self.sorted = [[] for _ in routes]
+
+    def update(self, enemies, store=None):
+        """Note that enemies have moved; store is the EnemyStore when it holds them"""
+        self.enemies = enemies
+        self.store = store
+        self.stale = True
+
+    def _build(self):
+        self.stale = False
+        route_count = len(self.keys)
+        store = self.store
+        if store is not None:
+            import numpy as np
+            slots = store.active_slots()
+            routes = store.route[slots]
+            views = store.views
+            for route in range(route_count):
+                on_route = slots[routes == route] if route_count > 1 else slots
+                keys = -store.distance[on_route]
+                order = np.argsort(keys, kind='stable')
+                self.keys[route] = keys[order].tolist()
+                self.sorted[route] = [views[slot] for slot in on_route[order].tolist()]
+            return
+
+        buckets = [[] for _ in range(route_count)]
+        route_ids = self.route_ids
+        for enemy in self.enemies:
+            buckets[route_ids[enemy.path]].append(enemy)
+        for route, bucket in enumerate(buckets):
+            bucket.sort(key=attrgetter('distance'), reverse=True)  # Stable, ties keep spawn order
+            self.keys[route] = [-enemy.distance for enemy in bucket]
+            self.sorted[route] = bucket
+
+    def lead(self):
+        """Return the enemy furthest along any route (the first route wins ties)"""
+        if self.stale:
+            self._build()
+        best = None
+        for bucket in self.sorted:
+            if bucket and (best is None or bucket[0].distance > best.distance):
+                best = bucket[0]
+        return best
+
+    def furthest(self, coverage, accept):
+        """Return the enemy furthest along whose progress lies in coverage and for which accept(enemy) holds.
+
+        coverage holds one list of (start, end) intervals per route, in path order.
+        """
+        if self.stale:
+            self._build()
+        best = None
+        for route, intervals in enumerate(coverage):
+            keys = self.keys[route]
+            if not keys:
+                continue
+            bucket = self.sorted[route]
+            found = None
+            for start, end in reversed(intervals):
+                for i in range(bisect_left(keys, -end), bisect_right(keys, -start)):
+                    if accept(bucket[i]):
+                        found = bucket[i]
+                        break
+                if found is not None:
+                    break
+            if found is not None and (best is None or found.distance > best.distance):
+                best = found
+        return best
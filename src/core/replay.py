@@ -0,0 +1,115 @@
+"""Record a game's inputs and replay them headlessly.
+
+The simulation advances in fixed ticks, so a game is fully determined by its
+seed and by which inputs happened before which tick. A replay is that input
+log plus the final state, as compact JSON:
+
+    {"version": 1, "seed": 123, "map": "classic", "events": [[tick, "place", "basic_compiler", 5, 11],
+     [tick, "wave"], [tick, "sell", 5, 11], [tick, "speed", 2.0], ...],
+     "final": {"tick": ..., "money": ..., "lives": ..., "wave": ...}}
+
+Replaying steps a fresh Simulation as fast as it can, applying each event at
+its tick, and can check the outcome against "final".
+"""
+import json
+
+from .settings import *
+from .simulation import Simulation
+
+REPLAY_VERSION = 1
+
+
+class ReplayRecorder:
+    """Input log for one game; the simulation calls record for every accepted input"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.events = []
+
+    def record(self, tick, action, *args):
+        self.events.append([tick, action, *args])
+
+    def to_dict(self, sim):
+        return {
+            'version': REPLAY_VERSION,
+            'seed': self.seed,
+            'map': sim.map.name,
+            'events': self.events,
+            'final': final_state(sim),
+        }
+
+    def save(self, path, sim):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(sim), f, separators=(',', ':'))
+
+
+def final_state(sim):
+    return {
+        'tick': sim.tick,
+        'money': sim.money,
+        'lives': sim.lives,
+        'wave': sim.wave,
+    }
+
+
+def load_replay(path):
+    with open(path) as f:
+        replay = json.load(f)
+    if replay.get('version') != REPLAY_VERSION:
+        raise ValueError(f"unsupported replay version {replay.get('version')}")
+    return replay
+
+
+def tower_at(sim, grid_x, grid_y):
+    for tower in sim.towers:
+        if tower.rect.centerx // TILE_SIZE == grid_x and tower.rect.centery // TILE_SIZE == grid_y:
+            return tower
+    return None
+
+
+def apply_event(sim, action, args):
+    if action == 'place':
+        sim.place_tower(*args)
+    elif action == 'sell':
+        tower = tower_at(sim, *args)
+        if tower is not None:
+            sim.sell_tower(tower)
+    elif action == 'wave':
+        sim.start_wave()
+    elif action == 'speed':
+        pass  # Ticks are fixed-length, game speed only changes how fast they are shown
+    else:
+        raise ValueError(f"unknown replay event '{action}'")
+
+
+def play_replay(replay, until_tick=None, vectorized=False, sim=None):
+    """Run a replay headlessly at uncapped speed and return the Simulation.
+
+    Stops at until_tick if given, otherwise at the recorded final tick.
+    """
+    if sim is None:
+        sim = Simulation(vectorized=vectorized, seed=replay['seed'], game_map=replay.get('map'))
+    if until_tick is None:
+        until_tick = replay['final']['tick']
+    time_delta = 1.0 / LOGIC_TICK_RATE
+
+    for tick, action, *args in replay['events']:
+        if tick > until_tick:
+            break
+        while sim.tick < tick:
+            sim.step(time_delta)
+        apply_event(sim, action, args)
+
+    while sim.tick < until_tick:
+        sim.step(time_delta)
+    return sim
+
+
+def verify_replay(replay, sim):
+    """Return a list of differences between the replayed and recorded final state"""
+    actual = final_state(sim)
+    return [
+        f"{key}: recorded {expected}, replayed {actual[key]}"
+        for key, expected in replay['final'].items()
+        if actual.get(key) != expected
+    ]
@@ -1,3 +1,6 @@
+import os
+from .waves import WaveConfigs, generate_wave
+
 # Window Settings
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 800
@@ -32,6 +35,8 @@ PARTICLE_EFFECTS = True
 TRAIL_LENGTH = 5  # For projectile trails
 GLOW_RADIUS = 20
 GLOW_INTENSITY = 150  # Alpha value for glow effect
+DIRTY_RECT_RENDERING = False  # Only redraw and present changed regions (low-end/software rendering)
+TEXT_CACHE_SIZE = 512  # Rendered text surfaces kept by the asset manager
 
 # Tower Visual Settings
 TOWER_GLOW_COLORS = {
@@ -62,6 +67,23 @@ STARTING_MONEY = 650
 STARTING_LIVES = 100
 NORMAL_GAME_SPEED = 1.0
 FAST_FORWARD_SPEED = 2.0  # Double speed for fast forward
+GAME_SPEEDS = [NORMAL_GAME_SPEED, FAST_FORWARD_SPEED, 4.0, 16.0, None]  # Fast forward cycles these, None is uncapped
+
+# Simulation Timing
+LOGIC_TICK_RATE = 60  # Fixed game logic ticks per second, independent of the render rate
+MAX_FRAME_TIME = 0.25  # Longest frame (seconds) fed into the tick accumulator, avoids a spiral of death
+
+# Profiler Settings
+PROFILER_ENABLED = bool(os.environ.get('CS_TD_PROFILE'))  # Time each phase of the frame (F3 toggles the overlay)
+PROFILER_WINDOW = 300  # Frames kept for the rolling percentiles
+PROFILER_DUMP_DIR = os.environ.get('CS_TD_PROFILE_DIR', os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'profiles')))  # Where F4 writes the CSV/JSON dumps
+
+# Replay Settings
+RECORD_REPLAYS = True  # Log every game's inputs and save them on exit
+REPLAY_DIR = os.environ.get('CS_TD_REPLAY_DIR', os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'replays')))
+
+# Save Settings
+SNAPSHOT_FILE = os.environ.get('CS_TD_SNAPSHOT_FILE', os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'saves', 'quicksave.snap')))  # F5 saves here, F9 loads
 
 # Path Settings
 TILE_SIZE = 32
@@ -79,19 +101,11 @@ GRID_OPACITY = 0.15
 GRID_LINE_COLOR = (100, 100, 100)
 GRID_HOVER_COLOR = (150, 150, 150, 30)
 
-# Define the path waypoints (in grid coordinates)
-PATH_WAYPOINTS = [
-    (0, 12),           # Start from left
-    (6, 12),          # Reduced x coordinates
-    (6, 4),
-    (12, 4),          # Reduced x coordinates
-    (12, 20),
-    (18, 20),         # Reduced x coordinates
-    (18, 8),
-    (24, 8),          # Reduced x coordinates
-    (24, 16),
-    (30, 16)          # End before UI panel
-]
+# Map Settings
+# Maps are JSON files in MAP_DIR (see maps.py); compiled maps are cached in MAP_CACHE_DIR (None disables it)
+MAP_DIR = os.environ.get('CS_TD_MAP_DIR', os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'assets', 'maps')))
+DEFAULT_MAP = os.environ.get('CS_TD_MAP', 'classic')
+MAP_CACHE_DIR = os.environ.get('CS_TD_MAP_CACHE_DIR', os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'cache', 'maps')))
 
 # Enemy Settings
 ENEMY_TYPES = {
@@ -172,6 +186,7 @@ TOWER_TYPES = {
         'damage': 3,
         'range': 140,
         'cooldown': 1.8,
+        'splash_radius': 48,  # Pixels around the enemy hit that take the same damage
         'color': (255, 50, 50),  # Red
         'description': 'Throws exceptions that explode on impact, affecting all nearby bugs.'
     },
@@ -180,6 +195,9 @@ TOWER_TYPES = {
         'damage': 1,
         'range': 100,
         'cooldown': 1.0,
+        'freeze': 0.5,  # Seconds the bugs hit stop for
+        'slow': 0.5,  # Then they move at this fraction of their speed...
+        'slow_duration': 2.0,  # ...for this many seconds once they thaw
         'color': (200, 200, 255),  # Ice blue
         'description': 'Freezes processes in cache, slowing down bugs temporarily.'
     },
@@ -188,6 +206,8 @@ TOWER_TYPES = {
         'damage': 1,
         'range': 120,
         'cooldown': 1.1,
+        'permanent_slow': 0.9,  # Each hit multiplies the bug's speed by this for good...
+        'permanent_slow_floor': 0.5,  # ...down to this fraction
         'color': (100, 255, 200),  # Mint green
         'description': 'Marks bugs for garbage collection, slowing them down.'
     },
@@ -328,57 +348,11 @@ WAVE_SCALING = {
 }
 
 def generate_waves(num_waves=100):
-    waves = []
-    
-    for wave_num in range(num_waves):
-        # Calculate scaling factors based on wave number
-        health_scale = WAVE_SCALING['health_multiplier'] ** (wave_num // 5)
-        count_scale = WAVE_SCALING['count_multiplier'] ** (wave_num // 3)
-        speed_scale = WAVE_SCALING['speed_multiplier'] ** (wave_num // 8)
-        
-        # Determine which enemies appear in this wave
-        enemies = []
-        
-        # Syntax errors appear in all waves
-        if wave_num >= 0:
-            count = int(WAVE_SCALING['base_counts']['syntax_error'] * count_scale)
-            enemies.append(('syntax_error', count))
-        
-        # Logic errors appear after wave 5
-        if wave_num >= 5:
-            count = int(WAVE_SCALING['base_counts']['logic_error'] * (count_scale * 0.8))
-            enemies.append(('logic_error', count))
-        
-        # Trojans appear after wave 10
-        if wave_num >= 10:
-            count = int(WAVE_SCALING['base_counts']['trojan'] * (count_scale * 0.6))
-            enemies.append(('trojan', count))
-        
-        # Memory leaks appear after wave 15
-        if wave_num >= 15:
-            count = int(WAVE_SCALING['base_counts']['memory_leak'] * (count_scale * 0.4))
-            enemies.append(('memory_leak', count))
-        
-        # Special waves every 10 waves
-        if wave_num > 0 and wave_num % 10 == 0:
-            # Boss wave - lots of memory leaks and stronger enemies
-            enemies = [
-                ('memory_leak', int(10 * count_scale)),
-                ('trojan', int(15 * count_scale)),
-                ('logic_error', int(20 * count_scale))
-            ]
-        
-        # Calculate spawn delay (gets shorter in later waves)
-        spawn_delay = max(0.2, 1.0 - (wave_num * 0.01))
-        
-        waves.append({
-            'enemies': enemies,
-            'spawn_delay': spawn_delay,
-            'health_scale': health_scale,
-            'speed_scale': speed_scale
-        })
-    
-    return waves
+    return [generate_wave(wave_num, WAVE_SCALING) for wave_num in range(num_waves)]
 
-# Generate 100 waves
-WAVE_CONFIGS = generate_waves(100) 
\ No newline at end of file
+# Waves are generated on demand. WAVE_COUNT = None plays endless (freeplay) mode,
+# and a JSON data file (see WaveConfigs.load) can change the count, the scaling
+# or individual waves without touching code.
+WAVE_COUNT = 100
+WAVE_DATA_FILE = os.environ.get('CS_TD_WAVE_FILE', os.path.join(os.path.dirname(__file__), 'waves.json'))
+WAVE_CONFIGS = WaveConfigs.load(WAVE_SCALING, WAVE_COUNT, WAVE_DATA_FILE)
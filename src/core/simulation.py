@@ -0,0 +1,374 @@
+import pygame
+import random
+from .settings import *
+from ..managers.asset_manager import AssetManager
+from ..managers.wave_manager import WaveManager
+from .events import (EventBus, MONEY_CHANGED, LIVES_CHANGED, WAVE_STARTED, WAVE_COMPLETED,
+                     TOWER_PLACED, TOWER_SOLD, ENEMY_KILLED, ENEMY_LEAKED)
+from .maps import TILE_EMPTY, TILE_TOWER
+from .flow_field import FlowField, FlowRoute
+from .pool import ObjectPool
+from .progress_index import ProgressIndex
+from .profiler import FrameProfiler
+from .spatial_grid import SpatialGrid
+from .status_effects import StatusTimers
+from ..entities.tower import Tower
+from ..entities.enemy import Enemy, FlowEnemy
+from ..entities.projectile import Projectile
+
+class Simulation:
+    """Game rules without a window: towers, enemies, projectiles, waves, money and lives.
+
+    step(time_delta) advances the game by one fixed tick; the rest is plain
+    state (money, lives, wave, tick, elapsed and the sprite groups) that
+    Game draws and snapshot.py saves. Nothing here touches the display.
+    """
+
+    def __init__(self, vectorized=False, tower_types=None, waves=None, seed=None, game_map=None):
+        # Balance data used by this game, TOWER_TYPES and WAVE_CONFIGS unless a balance run passes its own
+        self.tower_types = tower_types if tower_types is not None else TOWER_TYPES
+        self.waves = waves if waves is not None else WAVE_CONFIGS
+
+        # Change notifications for the UI, stats and telemetry
+        self.events = EventBus()
+
+        # Game state
+        self._money = STARTING_MONEY
+        self._lives = STARTING_LIVES
+        self.wave = 1
+        self.tick = 0  # Number of steps simulated
+        self.elapsed = 0.0  # Seconds of game time simulated
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)  # Recorded with replays
+
+        # Accepted inputs are logged here while recording (a replay.ReplayRecorder)
+        self.recorder = None
+
+        # Initialize managers (sprite surfaces are cached and shared across instances)
+        self.asset_manager = AssetManager.shared()
+        self.wave_manager = WaveManager(self)
+
+        # Initialize sprite groups
+        self.towers = pygame.sprite.Group()
+        self.enemies = pygame.sprite.Group()
+        self.projectiles = pygame.sprite.Group()
+
+        # Reusable enemy and projectile sprites
+        self.enemy_pool = ObjectPool(Enemy)
+        self.projectile_pool = ObjectPool(Projectile)
+
+        # Per-phase timings, off unless something turns it on (the game's F3 overlay)
+        self.profiler = FrameProfiler(window=PROFILER_WINDOW)
+
+        # Expiry times of the sprite enemies' slows and freezes
+        self.status_timers = StatusTimers()
+
+        # Enemy positions bucketed by tile, rebuilt each step for targeting and collisions
+        self.enemy_grid = SpatialGrid(TILE_SIZE)
+
+        # Compiled map (a GameMap, or the name of one in MAP_DIR), shared with other games on it
+        if game_map is None or isinstance(game_map, str):
+            game_map = self.asset_manager.get_map(game_map)
+        self.map = game_map
+
+        # This game's copy of the occupancy grid, one byte per tile by rows (see tile())
+        self.grid = bytearray(game_map.occupancy)
+
+        # Open maps route every enemy through one flow field over the grid
+        self.flow_field = None
+        if game_map.open:
+            if vectorized:
+                raise ValueError(f"map '{game_map.name}' is open, which the vectorized enemy store doesn't support")
+            self.flow_field = FlowField(game_map, self.grid)
+            self.routes = [FlowRoute(self.flow_field, spawn) for spawn in self.flow_field.spawns]
+            self.enemy_pool = ObjectPool(FlowEnemy)
+        else:
+            self.routes = game_map.routes
+        self.path = self.routes[0]
+        self.path_points = self.path.points
+
+        # Fixed paths let towers find targets by progress along the stretches they cover
+        self.enemy_progress = ProgressIndex(self.routes) if self.flow_field is None else None
+
+        # Optional structure-of-arrays enemy storage, for very large waves
+        self.enemy_store = None
+        if vectorized:
+            from ..entities.enemy_store import EnemyStore
+            self.enemy_store = EnemyStore(self.routes, assets=self.asset_manager)
+
+    @property
+    def money(self):
+        return self._money
+
+    @money.setter
+    def money(self, value):
+        old = self._money
+        self._money = value
+        if value != old:
+            self.events.emit(MONEY_CHANGED, old, value)
+
+    @property
+    def lives(self):
+        return self._lives
+
+    @lives.setter
+    def lives(self, value):
+        old = self._lives
+        self._lives = value
+        if value != old:
+            self.events.emit(LIVES_CHANGED, old, value)
+
+    @property
+    def game_over(self):
+        return self.lives <= 0
+
+    def tile(self, grid_x, grid_y):
+        """Return what occupies a grid cell (a TILE_* value), or None outside the map"""
+        if 0 <= grid_x < self.map.width and 0 <= grid_y < self.map.height:
+            return self.grid[grid_y * self.map.width + grid_x]
+        return None
+
+    def enemy_on_tile(self, index):
+        """Whether any enemy's center is on grid tile index (as of the last step)"""
+        return (index % self.map.width, index // self.map.width) in self.enemy_grid.cells
+
+    def spawn_enemy(self, enemy_type, route=0):
+        """Spawn an enemy at the start of the map's route-th path"""
+        # Get current wave config
+        wave_config = self.waves[self.wave - 1]
+
+        wave_scaling = {
+            'health_scale': wave_config['health_scale'],
+            'speed_scale': wave_config['speed_scale']
+        }
+
+        # Create enemy with wave scaling
+        if self.enemy_store is not None:
+            enemy = self.enemy_store.spawn(enemy_type, wave_scaling, route=route)
+        else:
+            enemy = self.enemy_pool.acquire(enemy_type, self.routes[route], wave_scaling, assets=self.asset_manager)
+        self.enemies.add(enemy)
+
+    def start_wave(self):
+        """Start the next wave. Returns False if a wave is already running or none are left."""
+        if self.wave_manager.start_wave():
+            self.wave += 1  # Increment wave counter when wave starts
+            if self.recorder is not None:
+                self.recorder.record(self.tick, 'wave')
+            self.events.emit(WAVE_STARTED, self.wave_manager.current_wave)
+            return True
+        return False
+
+    def wave_completed(self):
+        # Give bonus money for completing wave
+        # In BTD, end of round bonus is typically $100 for early rounds,
+        # increasing by small amounts each round
+        bonus = 100 + (self.wave * 10)  # Start at 100, increase by 10 per wave
+        self.money += bonus
+        self.events.emit(WAVE_COMPLETED, self.wave_manager.current_wave, bonus)
+
+    def can_place_tower(self, tower_type, grid_x, grid_y):
+        if not (self.tile(grid_x, grid_y) == TILE_EMPTY and
+                self.money >= self.tower_types[tower_type]['cost']):
+            return False
+
+        # On open maps the tower must leave enemies a way out
+        if self.flow_field is not None:
+            index = grid_y * self.map.width + grid_x
+            return (not self.enemy_on_tile(index) and
+                    self.flow_field.can_block(index, self.enemy_grid.cells))
+        return True
+
+    def place_tower(self, tower_type, grid_x, grid_y):
+        """Buy and place a tower on a grid cell. Returns the tower, or None if not allowed."""
+        if not self.can_place_tower(tower_type, grid_x, grid_y):
+            return None
+
+        index = grid_y * self.map.width + grid_x
+        if self.flow_field is not None:
+            self.flow_field.block(index)
+
+        tower = Tower(tower_type,
+                      (grid_x * TILE_SIZE + TILE_SIZE // 2,
+                       grid_y * TILE_SIZE + TILE_SIZE // 2),
+                      assets=self.asset_manager,
+                      projectile_pool=self.projectile_pool,
+                      stats=self.tower_types[tower_type])
+        self.towers.add(tower)
+        self.money -= self.tower_types[tower_type]['cost']
+        self.grid[index] = TILE_TOWER
+        if self.enemy_progress is not None:
+            tower.set_coverage(self.routes)
+        if self.recorder is not None:
+            self.recorder.record(self.tick, 'place', tower_type, grid_x, grid_y)
+        self.events.emit(TOWER_PLACED, tower)
+        return tower
+
+    def sell_tower(self, tower):
+        # Calculate refund (70% of original cost)
+        refund = int(self.tower_types[tower.type]['cost'] * 0.7)
+        self.money += refund
+
+        # Get grid position
+        grid_x = tower.rect.centerx // TILE_SIZE
+        grid_y = tower.rect.centery // TILE_SIZE
+
+        # Clear grid position
+        index = grid_y * self.map.width + grid_x
+        self.grid[index] = TILE_EMPTY
+        if self.flow_field is not None:
+            self.flow_field.unblock(index)
+        if self.recorder is not None:
+            self.recorder.record(self.tick, 'sell', grid_x, grid_y)
+
+        # Remove tower
+        tower.set_coverage(None)
+        tower.kill()
+        self.events.emit(TOWER_SOLD, tower, refund)
+        return refund
+
+    def step(self, time_delta):
+        """Advance the game rules by time_delta seconds of game time"""
+        self.tick += 1
+        self.elapsed += time_delta
+
+        # Sprites killed last tick can be reused from now on, so towers stop pointing at them first
+        if self.enemy_pool.pending:
+            for tower in self.towers:
+                tower.drop_dead_target()
+        self.enemy_pool.recycle()
+        self.projectile_pool.recycle()
+
+        profiler = self.profiler
+        with profiler.phase('waves'):
+            self.wave_manager.update(time_delta)
+        with profiler.phase('enemies'):
+            if self.flow_field is not None:
+                self.flow_field.settle()
+            if self.enemy_store is not None:
+                self.enemy_store.advance(time_delta, self.elapsed)
+                self.enemy_store.rebuild_grid(self.enemy_grid)
+            else:
+                self.status_timers.expire(self.elapsed)
+                for enemy in self.enemies:
+                    enemy.update(time_delta)
+                self.enemy_grid.rebuild(self.enemies)
+            if self.enemy_progress is not None:
+                self.enemy_progress.update(self.enemies, self.enemy_store)
+        with profiler.phase('towers'):
+            for tower in self.towers:
+                tower.update(self.enemies, self.projectiles, time_delta, self.enemy_grid, self.enemy_progress)
+        with profiler.phase('projectiles'):
+            for projectile in self.projectiles:
+                projectile.update(time_delta)
+
+        # Check projectile hits against the enemies in the cells each projectile overlaps
+        events = self.events
+        with profiler.phase('collisions'):
+            explosions = []
+            for projectile in self.projectiles:
+                for enemy in self.enemy_grid.query_rect(projectile.rect):
+                    if not enemy.alive():
+                        continue  # Already killed by another projectile this step
+                    if projectile.splash_radius:
+                        # Explodes around the enemy it struck, resolved with the others below
+                        explosions.append((enemy.rect.center, projectile.splash_radius,
+                                           projectile.damage, projectile.get_owner(), projectile.effect))
+                    else:
+                        if projectile.effect is not None:
+                            self.apply_effect(enemy, projectile.effect)
+                        if enemy.take_damage(projectile.damage):
+                            # Credit the tower that shot this projectile, if it hasn't been sold
+                            self.enemy_killed(enemy, projectile.get_owner())
+                    projectile.kill()
+                    break
+            if explosions:
+                self.resolve_explosions(explosions)
+
+        # Check if enemies reached the end
+        if self.enemy_store is not None:
+            leaked = self.enemy_store.reached_end()
+        else:
+            leaked = [enemy for enemy in self.enemies if enemy.reached_end]
+        for enemy in leaked:
+            self.lives -= enemy.stats['damage']
+            events.emit(ENEMY_LEAKED, enemy)
+            enemy.kill()
+
+    def enemy_killed(self, enemy, tower):
+        if tower is not None:
+            tower.record_kill(enemy)
+        self.money += enemy.reward
+        self.events.emit(ENEMY_KILLED, enemy, tower)
+        enemy.kill()
+
+    def apply_effect(self, enemy, effect):
+        """Put a StatusEffect on one enemy"""
+        if self.enemy_store is not None:
+            self.enemy_store.apply_effect([enemy.slot], effect, self.elapsed)
+        else:
+            self.status_timers.apply(enemy, effect, self.elapsed)
+
+    def resolve_explosions(self, explosions):
+        """Damage every enemy within each explosion's radius, all explosions in one pass.
+
+        explosions are (center, radius, damage, tower, effect) in the order
+        they went off; each finds its enemies with a radius query on the enemy
+        grid and puts its status effect (if any) on all of them, and the kill
+        goes to the explosion that finished the enemy.
+        """
+        store = self.enemy_store
+        hit_enemies = []
+        hit_damage = []
+        hit_towers = []
+        for center, radius, damage, tower, effect in explosions:
+            if store is not None:
+                found = store.query_radius(self.enemy_grid, center, radius)
+                if effect is not None and len(found):
+                    store.apply_effect(found, effect, self.elapsed)
+                found = found.tolist()
+            else:
+                found = [enemy for enemy in self.enemy_grid.query_radius(center, radius) if enemy.alive()]
+                if effect is not None:
+                    for enemy in found:
+                        self.status_timers.apply(enemy, effect, self.elapsed)
+            hit_enemies.extend(found)
+            hit_damage.extend([damage] * len(found))
+            hit_towers.extend([tower] * len(found))
+        if not hit_enemies:
+            return
+
+        # The EnemyStore applies them all at once; sprites take them in order
+        if store is not None:
+            killing = store.apply_hits(hit_enemies, hit_damage)
+            hit_enemies = [store.views[slot] for slot in hit_enemies]
+        else:
+            killing = [i for i, enemy in enumerate(hit_enemies)
+                       if enemy.health > 0 and enemy.take_damage(hit_damage[i])]
+        for i in killing:
+            self.enemy_killed(hit_enemies[i], hit_towers[i])
+
+    def pool_stats(self):
+        """Pool size metrics, for tuning and the benchmarks"""
+        return {
+            'enemies': self.enemy_pool.stats(),
+            'projectiles': self.projectile_pool.stats(),
+        }
+
+    def play_wave(self, time_delta=1.0 / LOGIC_TICK_RATE, max_ticks=None):
+        """Start the next wave and step until it is cleared or the game is lost.
+
+        Returns the number of ticks simulated, or None if no wave could be started.
+        """
+        if not self.start_wave():
+            return None
+        return self.finish_wave(time_delta, max_ticks)
+
+    def finish_wave(self, time_delta=1.0 / LOGIC_TICK_RATE, max_ticks=None):
+        """Step until the running wave is cleared or the game is lost. Returns the ticks simulated."""
+        ticks = 0
+        while self.wave_manager.wave_in_progress and not self.game_over:
+            self.step(time_delta)
+            ticks += 1
+            if max_ticks is not None and ticks >= max_ticks:
+                break
+        return ticks
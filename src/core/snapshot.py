@@ -0,0 +1,538 @@
+"""Compact, versioned binary snapshots of a running game.
+
+A snapshot holds everything the simulation needs to continue exactly where
+it left off. Entities are stored column by column as packed little-endian
+arrays, so saving thousands of them mid-wave is a handful of bulk copies.
+Snapshots from older versions still load, with defaults for what they lack.
+"""
+import math
+import struct
+import sys
+from array import array
+
+from .settings import *
+from .simulation import Simulation
+from .status_effects import make_effect
+from .maps import TILE_TOWER, TILE_BLOCKED
+from .flow_field import WALL, UNREACHABLE
+
+MAGIC = b'CTDS'
+SNAPSHOT_VERSION = 7
+
+FLAG_VECTORIZED = 1
+
+_HEADER = struct.Struct('<4sHB')
+_STATE = struct.Struct('<qqqqQ')
+_RANDOM = struct.Struct('<I625I?d')  # Versions 1-6
+_ELAPSED = struct.Struct('<d')
+_GRID = struct.Struct('<HH')
+_FLOW = struct.Struct('<q')  # Version 5
+_WAVES = struct.Struct('<q?dH')
+_LANE = struct.Struct('<dd?qH')
+_RUN = struct.Struct('<Hq')
+_ROUTES = struct.Struct('<HH')
+_COUNT = struct.Struct('<I')
+_STORE = struct.Struct('<II')
+
+# array typecode -> NumPy dtype of the same little-endian layout
+_NUMPY_TYPES = {'d': '<f8', 'q': '<i8', 'i': '<i4', 'H': '<u2'}
+
+# StatusEffect columns of a projectile that doesn't have one
+_NO_EFFECT = (0, 1, 0, 1, 0)
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class _Writer:
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt, *values):
+        self.parts.append(fmt.pack(*values))
+
+    def column(self, typecode, values):
+        if hasattr(values, 'dtype'):
+            self.parts.append(values.astype(_NUMPY_TYPES[typecode]).tobytes())
+            return
+        column = array(typecode, values)
+        if sys.byteorder == 'big':
+            column.byteswap()
+        self.parts.append(column.tobytes())
+
+    def names(self, names):
+        self.pack(_COUNT, len(names))
+        for name in names:
+            encoded = name.encode('utf-8')
+            self.parts.append(bytes((len(encoded),)) + encoded)
+
+    def getvalue(self):
+        return b''.join(self.parts)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt):
+        if self.offset + fmt.size > len(self.data):
+            raise SnapshotError("snapshot is truncated")
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def count(self):
+        return self.unpack(_COUNT)[0]
+
+    def raw(self, size):
+        if self.offset + size > len(self.data):
+            raise SnapshotError("snapshot is truncated")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def column(self, typecode, count):
+        column = array(typecode)
+        column.frombytes(self.raw(column.itemsize * count))
+        if sys.byteorder == 'big':
+            column.byteswap()
+        if typecode == 'd' and not math.isfinite(sum(column)):
+            raise SnapshotError("snapshot has a number that isn't finite")
+        return column
+
+    def numbers(self, fmt):
+        """Unpack fmt, raising SnapshotError if one of its floats isn't finite"""
+        values = self.unpack(fmt)
+        if not all(math.isfinite(value) for value in values if isinstance(value, float)):
+            raise SnapshotError("snapshot has a number that isn't finite")
+        return values
+
+    def names(self):
+        names = []
+        for _ in range(self.count()):
+            length = self.raw(1)[0]
+            try:
+                names.append(bytes(self.raw(length)).decode('utf-8'))
+            except UnicodeDecodeError:
+                raise SnapshotError("snapshot names are corrupt") from None
+        return names
+
+    def ids(self, count, limit, message):
+        """A column of indices into a list of limit items; raises SnapshotError(message) if one is out of range"""
+        column = self.column('H', count)
+        if count and max(column) >= limit:
+            raise SnapshotError(message)
+        return column
+
+
+def _check_bounds(values, low, high, message):
+    """Raise SnapshotError(message) if any of values is outside [low, high]"""
+    if values and not low <= min(values) <= max(values) <= high:
+        raise SnapshotError(message)
+
+
+def _number(value):
+    """Numbers are stored as doubles; give whole ones back as ints, like the settings use"""
+    return int(value) if value.is_integer() else value
+
+
+def save_snapshot(sim):
+    """Serialize a Simulation (or Game) to bytes"""
+    out = _Writer()
+    store = sim.enemy_store
+    out.pack(_HEADER, MAGIC, SNAPSHOT_VERSION, FLAG_VECTORIZED if store is not None else 0)
+    out.pack(_STATE, sim.tick, int(sim.money), int(sim.lives), sim.wave, sim.seed)
+    out.pack(_ELAPSED, sim.elapsed)
+
+    enemy_names = list(ENEMY_TYPES)
+    tower_names = list(sim.tower_types)
+    out.names([sim.map.name])
+    out.names(enemy_names)
+    out.names(tower_names)
+    enemy_ids = {name: i for i, name in enumerate(enemy_names)}
+    tower_ids = {name: i for i, name in enumerate(tower_names)}
+
+    # Map grid
+    out.pack(_GRID, sim.map.width, sim.map.height)
+    out.parts.append(bytes(sim.grid))
+    field = sim.flow_field
+    if field is not None:
+        out.column('i', field.dist)
+
+    # Wave manager and its spawn lanes
+    manager = sim.wave_manager
+    out.pack(_WAVES, manager.current_wave, manager.wave_in_progress, manager.spawn_delay, len(manager.lanes))
+    for lane in manager.lanes:
+        out.pack(_LANE, lane.spawn_delay, lane.timer, lane.interleave, lane.remaining, len(lane.runs))
+        for enemy_type, count in lane.runs:
+            out.pack(_RUN, enemy_ids[enemy_type], count)
+        out.pack(_ROUTES, len(lane.routes), lane.route_cursor)
+        out.column('H', lane.routes)
+
+    # Towers
+    towers = list(sim.towers)
+    out.pack(_COUNT, len(towers))
+    out.column('H', [tower_ids[tower.type] for tower in towers])
+    out.column('H', [tower.rect.centerx // TILE_SIZE for tower in towers])
+    out.column('H', [tower.rect.centery // TILE_SIZE for tower in towers])
+    out.column('d', [tower.damage for tower in towers])
+    out.column('d', [tower.range for tower in towers])
+    out.column('d', [tower.cooldown for tower in towers])
+    out.column('d', [tower.cooldown_remaining for tower in towers])
+    out.column('q', [tower.enemies_defeated for tower in towers])
+    out.column('q', [tower.shots_fired for tower in towers])
+    out.column('d', [tower.damage_dealt for tower in towers])
+
+    # Enemies, in group order so targeting ties resolve the same way after loading
+    enemies = list(sim.enemies)
+    out.pack(_COUNT, len(enemies))
+    out.column('H', [enemy_ids[enemy.type] for enemy in enemies])
+    out.column('H', [sim.routes.index(enemy.path) for enemy in enemies])
+    out.column('d', [enemy.stats['health'] for enemy in enemies])
+    out.column('d', [enemy.stats['reward'] for enemy in enemies])
+    out.column('d', [enemy.stats['damage'] for enemy in enemies])
+    if store is not None:
+        out.pack(_STORE, store.size, len(store.free_slots))
+        out.column('i', store.free_slots)
+        slots = array('i', [enemy.slot for enemy in enemies])
+        out.column('i', slots)
+        index = slots.tolist()
+        out.column('d', store.distance[index])
+        out.column('d', store.speed[index])
+        out.column('d', store.health[index])
+        out.column('d', store.max_health[index])
+    else:
+        out.pack(_STORE, 0, 0)
+        out.column('d', [enemy.distance for enemy in enemies])
+        out.column('d', [enemy.speed for enemy in enemies])
+        out.column('d', [enemy.health for enemy in enemies])
+        out.column('d', [enemy.max_health for enemy in enemies])
+        if sim.flow_field is not None:
+            out.column('d', [enemy.x for enemy in enemies])
+            out.column('d', [enemy.y for enemy in enemies])
+            out.column('i', [enemy.target for enemy in enemies])
+    for field in ('slow', 'slow_until', 'freeze_until', 'permanent_slow'):
+        if store is not None:
+            out.column('d', getattr(store, field)[index])
+        else:
+            out.column('d', [getattr(enemy, field) for enemy in enemies])
+
+    # Projectiles, with their owner as an index into the tower list
+    projectiles = list(sim.projectiles)
+    tower_index = {tower: i for i, tower in enumerate(towers)}
+    owners = []
+    for projectile in projectiles:
+        owner = projectile.get_owner()
+        owners.append(tower_index.get(owner, -1) if owner is not None else -1)
+    out.pack(_COUNT, len(projectiles))
+    out.column('i', [projectile.rect.x for projectile in projectiles])
+    out.column('i', [projectile.rect.y for projectile in projectiles])
+    out.column('d', [projectile.target.x for projectile in projectiles])
+    out.column('d', [projectile.target.y for projectile in projectiles])
+    out.column('d', [projectile.damage for projectile in projectiles])
+    out.column('d', [projectile.speed for projectile in projectiles])
+    out.column('i', owners)
+    out.column('d', [projectile.splash_radius for projectile in projectiles])
+    effects = [projectile.effect or _NO_EFFECT for projectile in projectiles]
+    for field in range(len(_NO_EFFECT)):
+        out.column('d', [effect[field] for effect in effects])
+
+    return out.getvalue()
+
+
+def _clear(sim):
+    # Killing releases pooled sprites and EnemyStore slots
+    for group in (sim.projectiles, sim.enemies, sim.towers):
+        for sprite in list(group):
+            sprite.kill()
+
+
+def load_snapshot(data, sim=None, **kwargs):
+    """Restore a snapshot into sim, or into a new Simulation built with kwargs.
+
+    An existing sim must use the same enemy storage (vectorized or not) and
+    map as the game that was saved. The whole snapshot is read and checked
+    before sim is touched, so on SnapshotError sim is left as it was;
+    otherwise it is cleared and replaced by the saved game.
+    """
+    reader = _Reader(data)
+    magic, version, flags = reader.unpack(_HEADER)
+    if magic != MAGIC:
+        raise SnapshotError("not a snapshot")
+    if not 1 <= version <= SNAPSHOT_VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+    vectorized = bool(flags & FLAG_VECTORIZED)
+
+    tick, money, lives, wave, seed = reader.unpack(_STATE)
+    if version < 7:
+        reader.unpack(_RANDOM)  # An RNG the game never drew from
+    elapsed = reader.numbers(_ELAPSED)[0] if version >= 4 else 0.0
+    if version >= 2:
+        map_names = reader.names()
+        if len(map_names) != 1:
+            raise SnapshotError("snapshot map name is corrupt")
+        map_name = map_names[0]
+    else:
+        map_name = DEFAULT_MAP  # Saved before there were several maps
+
+    if sim is None:
+        kwargs.setdefault('game_map', map_name)
+        target = Simulation(vectorized=vectorized, seed=seed, **kwargs)
+    elif (sim.enemy_store is not None) != vectorized:
+        raise SnapshotError("snapshot and game use different enemy storage")
+    elif sim.map.name != map_name:
+        raise SnapshotError(f"snapshot is of map '{map_name}', not '{sim.map.name}'")
+    else:
+        target = sim
+    open_map = target.flow_field is not None
+    route_count = len(target.routes)
+
+    enemy_names = reader.names()
+    tower_names = reader.names()
+    for name in enemy_names:
+        if name not in ENEMY_TYPES:
+            raise SnapshotError(f"unknown enemy type '{name}'")
+    for name in tower_names:
+        if name not in target.tower_types:
+            raise SnapshotError(f"unknown tower type '{name}'")
+
+    # Map grid
+    width, height = reader.unpack(_GRID)
+    if (width, height) != (target.map.width, target.map.height):
+        raise SnapshotError(f"snapshot grid is {width}x{height}, "
+                            f"map '{target.map.name}' is {target.map.width}x{target.map.height}")
+    grid = bytes(reader.raw(width * height))
+    flow_dist = None
+    if open_map and version >= 5:  # Older ones rebuild the flow field from the grid
+        if version == 5:
+            reader.unpack(_FLOW)  # How far a since dropped deferred rebuild had got
+        flow_dist = reader.column('i', width * height).tolist()
+        walls = (TILE_TOWER, TILE_BLOCKED)
+        if any((d == WALL) != (tile in walls) or not WALL <= d <= UNREACHABLE for d, tile in zip(flow_dist, grid)):
+            raise SnapshotError("flow field doesn't match the grid")
+
+    # Wave manager
+    from ..managers.wave_manager import SpawnLane
+    current_wave, wave_in_progress, spawn_delay, lane_count = reader.numbers(_WAVES)
+    for number in (wave, current_wave):
+        if number and not target.waves.has_wave(number - 1):
+            raise SnapshotError(f"wave {number} isn't part of this game")
+        try:
+            target.waves[max(number - 1, 0)]
+        except (OverflowError, ValueError):
+            raise SnapshotError(f"wave {number} isn't part of this game") from None
+    lanes = []
+    for _ in range(lane_count):
+        lane_delay, timer, interleave, remaining, run_count = reader.numbers(_LANE)
+        runs = []
+        for _ in range(run_count):
+            type_id, count = reader.unpack(_RUN)
+            if type_id >= len(enemy_names):
+                raise SnapshotError("spawn lane enemy types don't match the snapshot")
+            if count <= 0:
+                raise SnapshotError("spawn lane runs are corrupt")
+            runs.append((enemy_names[type_id], count))
+        if remaining != sum(count for enemy_type, count in runs):
+            raise SnapshotError("spawn lane runs are corrupt")
+        lane = SpawnLane(runs, lane_delay, timer, interleave)
+        if version >= 2:
+            lane_routes, lane.route_cursor = reader.unpack(_ROUTES)
+            lane.routes = tuple(reader.ids(lane_routes, route_count, "spawn lane routes don't match the map"))
+            if lane.route_cursor >= len(lane.routes):
+                raise SnapshotError("spawn lane routes are corrupt")
+        lanes.append(lane)
+
+    # Towers
+    tower_count = reader.count()
+    tower_types = reader.ids(tower_count, len(tower_names), "tower types don't match the snapshot")
+    grid_xs = reader.ids(tower_count, width, "tower outside the map")
+    grid_ys = reader.ids(tower_count, height, "tower outside the map")
+    tower_damage = reader.column('d', tower_count)
+    ranges = reader.column('d', tower_count)
+    _check_bounds(ranges, 0, (width + height) * TILE_SIZE, "tower range is corrupt")
+    cooldown = reader.column('d', tower_count)
+    cooldown_remaining = reader.column('d', tower_count)
+    enemies_defeated = reader.column('q', tower_count)
+    shots_fired = reader.column('q', tower_count)
+    damage_dealt = reader.column('d', tower_count)
+
+    # Enemies
+    enemy_count = reader.count()
+    enemy_types = reader.ids(enemy_count, len(enemy_names), "enemy types don't match the snapshot")
+    if version >= 2:
+        routes = reader.ids(enemy_count, route_count, "enemy routes don't match the map")
+    else:
+        routes = [0] * enemy_count
+    base_health = reader.column('d', enemy_count)
+    reward = reader.column('d', enemy_count)
+    leak_damage = reader.column('d', enemy_count)
+    store_size, free_count = reader.unpack(_STORE)
+    if vectorized:
+        free_slots = reader.column('i', free_count).tolist()
+        slots = reader.column('i', enemy_count)
+        used = slots.tolist() + free_slots
+        if len(set(used)) != len(used) or (used and not 0 <= min(used) <= max(used) < store_size):
+            raise SnapshotError("enemy store slots are corrupt")
+    distance = reader.column('d', enemy_count)
+    speed = reader.column('d', enemy_count)
+    health = reader.column('d', enemy_count)
+    max_health = reader.column('d', enemy_count)
+    if open_map and not vectorized:
+        xs = reader.column('d', enemy_count)
+        ys = reader.column('d', enemy_count)
+        targets = reader.column('i', enemy_count)
+        _check_bounds(targets, 0, width * height - 1, "enemy target tiles are outside the map")
+        _check_bounds(xs, 0, width * TILE_SIZE, "enemy outside the map")
+        _check_bounds(ys, 0, height * TILE_SIZE, "enemy outside the map")
+    if version >= 4:
+        effect_fields = {field: reader.column('d', enemy_count)
+                         for field in ('slow', 'slow_until', 'freeze_until', 'permanent_slow')}
+    else:
+        effect_fields = {}
+
+    # Projectiles
+    projectile_count = reader.count()
+    projectile_xs = reader.column('i', projectile_count)
+    projectile_ys = reader.column('i', projectile_count)
+    target_xs = reader.column('d', projectile_count)
+    target_ys = reader.column('d', projectile_count)
+    projectile_damage = reader.column('d', projectile_count)
+    projectile_speed = reader.column('d', projectile_count)
+    owners = reader.column('i', projectile_count)
+    if projectile_count and max(owners) >= tower_count:
+        raise SnapshotError("projectile owners don't match the snapshot")
+
+    # Projectiles fly between towers and enemies, so anything far off the map is corrupt
+    margin_x, margin_y = width * TILE_SIZE, height * TILE_SIZE
+    for values, size in ((projectile_xs, margin_x), (projectile_ys, margin_y), (target_xs, margin_x), (target_ys, margin_y)):
+        _check_bounds(values, -size, 2 * size, "projectile outside the map")
+    splash_radius = reader.column('d', projectile_count) if version >= 3 else [0] * projectile_count
+    if version >= 4:  # Status effects
+        effect_columns = [reader.column('d', projectile_count) for _ in _NO_EFFECT]
+        effects = [make_effect(*(_number(column[i]) for column in effect_columns))
+                   for i in range(projectile_count)]
+    else:
+        effects = [None] * projectile_count
+
+    # Everything is read and checked; from here on the game is replaced
+    sim = target
+    _clear(sim)
+    sim.tick, sim.money, sim.lives, sim.wave, sim.seed = tick, money, lives, wave, seed
+    sim.elapsed = elapsed
+
+    sim.grid[:] = grid  # In place, the flow field reads it too
+    field = sim.flow_field
+    if field is not None and flow_dist is not None:
+        field.restore(flow_dist)  # As saved, possibly partway through a repair
+    elif field is not None:
+        field.rebuild()
+
+    manager = sim.wave_manager
+    manager.current_wave, manager.wave_in_progress, manager.spawn_delay = current_wave, wave_in_progress, spawn_delay
+    manager.lanes = lanes
+
+    from ..entities.tower import Tower
+    towers = []
+    for i in range(tower_count):
+        tower_type = tower_names[tower_types[i]]
+        tower = Tower(tower_type,
+                      (grid_xs[i] * TILE_SIZE + TILE_SIZE // 2,
+                       grid_ys[i] * TILE_SIZE + TILE_SIZE // 2),
+                      assets=sim.asset_manager,
+                      projectile_pool=sim.projectile_pool,
+                      stats=sim.tower_types[tower_type])
+        tower.damage = _number(tower_damage[i])
+        tower.range = _number(ranges[i])
+        tower.cooldown = _number(cooldown[i])
+        tower.cooldown_remaining = cooldown_remaining[i]
+        tower.enemies_defeated = enemies_defeated[i]
+        tower.shots_fired = shots_fired[i]
+        tower.damage_dealt = _number(damage_dealt[i])
+        if sim.enemy_progress is not None:
+            tower.set_coverage(sim.routes)
+        towers.append(tower)
+    sim.towers.add(*towers)
+
+    enemies = []
+    if vectorized:
+        store = sim.enemy_store
+        for i in range(enemy_count):
+            enemy = store.spawn(enemy_names[enemy_types[i]], slot=slots[i], route=routes[i])
+            enemies.append(enemy)
+        store.size = store_size
+        store.free_slots = free_slots
+        index = slots.tolist()
+        store.distance[index] = distance
+        store.speed[index] = speed
+        store.health[index] = health
+        store.max_health[index] = max_health
+        located = [sim.routes[route].locate(d) for route, d in zip(routes, distance)]
+        store.path_index[index] = [path_index for path_index, x, y in located]
+        store.x[index] = [x for path_index, x, y in located]
+        store.y[index] = [y for path_index, x, y in located]
+        for field, values in effect_fields.items():
+            getattr(store, field)[index] = values
+        if enemy_count and effect_fields:
+            store.effects_until = max(store.freeze_until[index].max(), store.slow_until[index].max())
+            store.permanently_slowed = int((store.permanent_slow[index] < 1).sum())
+    else:
+        for i in range(enemy_count):
+            path = sim.routes[routes[i]]
+            enemy = sim.enemy_pool.acquire(enemy_names[enemy_types[i]], path, assets=sim.asset_manager)
+            enemy.distance = distance[i]
+            if open_map:
+                x, y = enemy.x, enemy.y = xs[i], ys[i]
+                enemy.target = targets[i]  # Leaked enemies are gone by the end of a step
+            else:
+                enemy.reached_end = distance[i] >= path.total_length
+                enemy.path_index, x, y = path.locate(distance[i])
+            enemy.rect.center = (int(x), int(y))
+            enemy.speed = enemy.stats['speed'] = _number(speed[i])
+            enemy.health = _number(health[i])
+            enemy.max_health = _number(max_health[i])
+            for field, values in effect_fields.items():
+                setattr(enemy, field, values[i])
+            enemies.append(enemy)
+        sim.status_timers.clear()
+        for enemy in enemies:
+            sim.status_timers.track(enemy, sim.elapsed)
+
+    for i, enemy in enumerate(enemies):
+        enemy.stats['health'] = _number(base_health[i])
+        enemy.stats['reward'] = enemy.reward = _number(reward[i])
+        enemy.stats['damage'] = _number(leak_damage[i])
+        if vectorized:
+            enemy.stats['speed'] = _number(speed[i])
+    sim.enemies.add(*enemies)
+
+    projectiles = []
+    for i in range(projectile_count):
+        owner = towers[owners[i]] if owners[i] >= 0 else None
+        projectile = sim.projectile_pool.acquire((projectile_xs[i], projectile_ys[i]), (target_xs[i], target_ys[i]),
+                                                 _number(projectile_damage[i]),
+                                                 speed=_number(projectile_speed[i]),
+                                                 owner=owner, assets=sim.asset_manager,
+                                                 splash_radius=_number(float(splash_radius[i])),
+                                                 effect=effects[i])
+        projectile.rect.topleft = (projectile_xs[i], projectile_ys[i])
+        projectiles.append(projectile)
+    sim.projectiles.add(*projectiles)
+
+    sim.enemy_grid.rebuild(sim.enemies)
+    if sim.enemy_progress is not None:
+        sim.enemy_progress.update(sim.enemies, sim.enemy_store)
+    return sim
+
+
+def write_snapshot(path, sim):
+    data = save_snapshot(sim)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def read_snapshot(path, sim=None, **kwargs):
+    with open(path, 'rb') as f:
+        return load_snapshot(f.read(), sim, **kwargs)
@@ -0,0 +1,90 @@
+from .settings import *
+
+class SpatialGrid:
+    """Uniform grid that buckets sprites by the cell their center falls in.
+
+    Rebuilt once per tick after enemies move, so towers can look up nearby
+    enemies by range and projectiles only test the enemies in the cells they
+    overlap, instead of checking every enemy.
+    """
+
+    def __init__(self, cell_size=TILE_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+        self.extent = 0  # Largest half-size of any sprite, pads rect queries
+
+    def rebuild(self, sprites):
+        cells = {}
+        cell_size = self.cell_size
+        count = 0
+        extent = 0
+        for sprite in sprites:
+            rect = sprite.rect
+            cx, cy = rect.center
+            if rect.width > extent:
+                extent = rect.width
+            if rect.height > extent:
+                extent = rect.height
+            key = (cx // cell_size, cy // cell_size)
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [sprite]
+            else:
+                bucket.append(sprite)
+            count += 1
+        self.cells = cells
+        self.count = count
+        self.extent = extent // 2 + 1
+
+    def _buckets_in_box(self, left, top, right, bottom):
+        """Yield the occupied buckets whose cells overlap a pixel-space box"""
+        cell_size = self.cell_size
+        min_x, max_x = int(left // cell_size), int(right // cell_size)
+        min_y, max_y = int(top // cell_size), int(bottom // cell_size)
+
+        # Large queries (e.g. global-range towers) are cheaper as a scan of the occupied cells
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.cells):
+            for (x, y), bucket in self.cells.items():
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    yield bucket
+            return
+
+        cells = self.cells
+        for y in range(min_y, max_y + 1):
+            for x in range(min_x, max_x + 1):
+                bucket = cells.get((x, y))
+                if bucket is not None:
+                    yield bucket
+
+    def query_box(self, left, top, right, bottom):
+        """Return the sprites in every cell overlapping a pixel-space box, in cell order"""
+        found = []
+        for bucket in self._buckets_in_box(left, top, right, bottom):
+            found.extend(bucket)
+        return found
+
+    def query_radius(self, center, radius):
+        """Return the sprites whose center is strictly within radius of center"""
+        cx, cy = center
+        radius_sq = radius * radius
+        found = []
+        for bucket in self._buckets_in_box(cx - radius, cy - radius, cx + radius, cy + radius):
+            for sprite in bucket:
+                sx, sy = sprite.rect.center
+                dx = sx - cx
+                dy = sy - cy
+                if dx * dx + dy * dy < radius_sq:
+                    found.append(sprite)
+        return found
+
+    def query_rect(self, rect):
+        """Return the sprites whose rect overlaps rect, in cell order"""
+        pad = self.extent
+        found = []
+        for bucket in self._buckets_in_box(rect.left - pad, rect.top - pad,
+                                           rect.right + pad, rect.bottom + pad):
+            for sprite in bucket:
+                if rect.colliderect(sprite.rect):
+                    found.append(sprite)
+        return found
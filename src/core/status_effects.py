@@ -0,0 +1,112 @@
+"""Status effects towers put on enemies: freezes, slows and permanent slows.
+
+Effects are not kept as a list of effect objects per enemy. Every enemy has
+the same few fields: the factor and expiry of its timed slow, when its
+freeze ends, and the product of its permanent slows. Movement multiplies
+the enemy's speed by the scale those add up to:
+
+- in the EnemyStore the fields are columns next to speed, and advance
+  combines them for the whole wave in one vectorized pass, so expired
+  effects simply stop counting;
+- sprite enemies hold them in slots together with their current
+  speed_scale, and a StatusTimers heap recomputes speed_scale when one of
+  an enemy's effects runs out, so enemies whose effects aren't changing
+  cost nothing per tick.
+
+Times are seconds of game time (Simulation.elapsed). A timed slow starts
+once the enemy thaws, so a freeze doesn't eat into it. It doesn't stack:
+the strongest running one wins and applying it again extends it.
+Permanent slows stack down to a floor and last until the enemy dies.
+"""
+import heapq
+import itertools
+from collections import namedtuple
+
+# What a tower's hits do to an enemy's speed:
+#   freeze           seconds the enemy stops for (0 for none)
+#   slow             speed factor of the timed slow, below 1 (1 for none)
+#   slow_duration    seconds the timed slow lasts, from the end of the freeze
+#   permanent_slow   speed factor each hit multiplies in for good (1 for none)
+#   permanent_floor  lowest the permanent slows can take that factor to
+StatusEffect = namedtuple('StatusEffect', ['freeze', 'slow', 'slow_duration', 'permanent_slow', 'permanent_floor'])
+
+
+def make_effect(freeze=0, slow=1, slow_duration=0, permanent_slow=1, permanent_floor=0):
+    """Return a StatusEffect, or None if it wouldn't change anything"""
+    if not (slow < 1 and slow_duration > 0):
+        slow, slow_duration = 1, 0
+    if freeze <= 0 and slow_duration == 0 and permanent_slow >= 1:
+        return None
+    return StatusEffect(max(freeze, 0), slow, slow_duration, min(permanent_slow, 1), permanent_floor)
+
+
+def effect_from_stats(stats):
+    """The effect a tower's hits apply, from its stats (see TOWER_TYPES), or None"""
+    return make_effect(stats.get('freeze', 0), stats.get('slow', 1), stats.get('slow_duration', 0),
+                       stats.get('permanent_slow', 1), stats.get('permanent_slow_floor', 0))
+
+
+def speed_scale(now, slow, slow_until, freeze_until, permanent_slow):
+    """Factor an enemy's speed is multiplied by at game time now"""
+    if freeze_until > now:
+        return 0.0
+    if slow_until > now:
+        return slow * permanent_slow
+    return permanent_slow
+
+
+class StatusTimers:
+    """Effect bookkeeping for sprite enemies (Enemy and FlowEnemy).
+
+    apply writes an effect into the enemy's fields and queues the times its
+    speed_scale changes next; expire, called once per step, pops the times
+    that have passed. Entries for enemies that died or were hit again since
+    are harmless: popping one just recomputes speed_scale from the fields.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()  # Breaks ties so enemies are never compared
+
+    def __len__(self):
+        return len(self.heap)
+
+    def clear(self):
+        self.heap.clear()
+
+    def apply(self, enemy, effect, now):
+        """Put a StatusEffect on enemy at game time now"""
+        changes = []
+        if effect.freeze > 0 and now + effect.freeze > enemy.freeze_until:
+            enemy.freeze_until = now + effect.freeze
+            changes.append(enemy.freeze_until)
+        if effect.slow_duration > 0:
+            until = max(now, enemy.freeze_until) + effect.slow_duration
+            if enemy.slow_until <= now or effect.slow < enemy.slow:
+                enemy.slow = effect.slow
+                enemy.slow_until = until
+                changes.append(until)
+            elif effect.slow == enemy.slow and until > enemy.slow_until:
+                enemy.slow_until = until
+                changes.append(until)
+        if effect.permanent_slow < 1:
+            enemy.permanent_slow = max(enemy.permanent_slow * effect.permanent_slow, effect.permanent_floor)
+
+        enemy.speed_scale = speed_scale(now, enemy.slow, enemy.slow_until, enemy.freeze_until, enemy.permanent_slow)
+        for until in changes:
+            heapq.heappush(self.heap, (until, next(self.counter), enemy))
+
+    def track(self, enemy, now):
+        """Recompute enemy's speed_scale and queue the expiries still ahead of it (after loading a game)"""
+        enemy.speed_scale = speed_scale(now, enemy.slow, enemy.slow_until, enemy.freeze_until, enemy.permanent_slow)
+        for until in (enemy.freeze_until, enemy.slow_until):
+            if until > now:
+                heapq.heappush(self.heap, (until, next(self.counter), enemy))
+
+    def expire(self, now):
+        """Update the enemies with an effect that ran out by game time now"""
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            enemy = heapq.heappop(heap)[2]
+            enemy.speed_scale = speed_scale(now, enemy.slow, enemy.slow_until, enemy.freeze_until,
+                                            enemy.permanent_slow)
@@ -0,0 +1,123 @@
+import copy
+import json
+import os
+
+def generate_wave(wave_num, scaling):
+    """Build the config for wave_num (0-based) from the wave scaling settings"""
+    # Calculate scaling factors based on wave number
+    health_scale = scaling['health_multiplier'] ** (wave_num // 5)
+    count_scale = scaling['count_multiplier'] ** (wave_num // 3)
+    speed_scale = scaling['speed_multiplier'] ** (wave_num // 8)
+
+    # Determine which enemies appear in this wave
+    enemies = []
+
+    # Syntax errors appear in all waves
+    if wave_num >= 0:
+        count = int(scaling['base_counts']['syntax_error'] * count_scale)
+        enemies.append(('syntax_error', count))
+
+    # Logic errors appear after wave 5
+    if wave_num >= 5:
+        count = int(scaling['base_counts']['logic_error'] * (count_scale * 0.8))
+        enemies.append(('logic_error', count))
+
+    # Trojans appear after wave 10
+    if wave_num >= 10:
+        count = int(scaling['base_counts']['trojan'] * (count_scale * 0.6))
+        enemies.append(('trojan', count))
+
+    # Memory leaks appear after wave 15
+    if wave_num >= 15:
+        count = int(scaling['base_counts']['memory_leak'] * (count_scale * 0.4))
+        enemies.append(('memory_leak', count))
+
+    # Special waves every 10 waves
+    if wave_num > 0 and wave_num % 10 == 0:
+        # Boss wave - lots of memory leaks and stronger enemies
+        enemies = [
+            ('memory_leak', int(10 * count_scale)),
+            ('trojan', int(15 * count_scale)),
+            ('logic_error', int(20 * count_scale))
+        ]
+
+    # Calculate spawn delay (gets shorter in later waves)
+    spawn_delay = max(0.2, 1.0 - (wave_num * 0.01))
+
+    return {
+        'enemies': enemies,
+        'spawn_delay': spawn_delay,
+        'health_scale': health_scale,
+        'speed_scale': speed_scale
+    }
+
+
+class WaveConfigs:
+    """Lazy, memoized wave configs, indexed like the old list of waves.
+
+    Wave N is generated the first time it is asked for, so importing the
+    settings costs nothing and any wave number can be played.
+    wave_count=None means endless (freeplay) mode. `overrides` maps 0-based
+    wave numbers to config keys that replace the generated ones.
+    """
+
+    def __init__(self, scaling, wave_count=100, overrides=None):
+        self.scaling = scaling
+        self.wave_count = wave_count
+        self.overrides = overrides or {}
+        self._cache = {}
+
+    @classmethod
+    def load(cls, scaling, wave_count=100, path=None):
+        """Create the provider, applying a JSON data file if one exists at path.
+
+        The file may contain "wave_count" (null for endless), "scaling"
+        (merged over the defaults, including "base_counts") and "waves", a
+        mapping of 1-based wave numbers to config overrides.
+        """
+        if not path or not os.path.exists(path):
+            return cls(scaling, wave_count)
+
+        with open(path) as f:
+            data = json.load(f)
+
+        scaling = copy.deepcopy(scaling)
+        for key, value in data.get('scaling', {}).items():
+            if isinstance(value, dict):
+                scaling.setdefault(key, {}).update(value)
+            else:
+                scaling[key] = value
+
+        overrides = {int(number) - 1: wave for number, wave in data.get('waves', {}).items()}
+        return cls(scaling, data.get('wave_count', wave_count), overrides)
+
+    @property
+    def endless(self):
+        return self.wave_count is None
+
+    def has_wave(self, index):
+        """Whether 0-based wave index is part of the game"""
+        return index >= 0 and (self.endless or index < self.wave_count)
+
+    def __len__(self):
+        if self.endless:
+            raise TypeError("endless wave configs have no length")
+        return self.wave_count
+
+    def __getitem__(self, index):
+        if index < 0:
+            raise IndexError(index)
+
+        wave = self._cache.get(index)
+        if wave is None:
+            wave = generate_wave(index, self.scaling)
+            if index in self.overrides:
+                wave.update(self.overrides[index])
+            self._cache[index] = wave
+        return wave
+
+    def __iter__(self):
+        index = 0
+        while self.has_wave(index):
+            yield self[index]
+            index += 1
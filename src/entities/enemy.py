@@ -1,12 +1,33 @@
 import pygame
-from ..core.settings import *
 import math
+from ..core.settings import *
+from ..core.flow_field import WALL
+from ..managers.asset_manager import AssetManager
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, enemy_type, path_points, wave_scaling=None):
+    # Fixed attribute layout; instances are pooled and reset in place
+    __slots__ = ('type', 'stats', 'base_image', 'image', 'rect', 'assets', 'path', 'path_points',
+                 'distance', 'path_index', 'reached_end', 'max_health', 'health', 'speed',
+                 'reward', 'slow', 'slow_until', 'freeze_until', 'permanent_slow', 'speed_scale',
+                 'pool', 'pooled_in_use')
+    
+    def __init__(self, enemy_type, path, wave_scaling=None, assets=None):
         super().__init__()
+        self.pool = None
+        self.pooled_in_use = False
+        self.stats = {}
+        
+        # Sprite surfaces are shared between all enemies of a type
+        self.assets = assets if assets is not None else AssetManager.shared()
+        self.rect = self.assets.get_enemy_image(enemy_type).get_rect()
+        
+        self.reset(enemy_type, path, wave_scaling)
+    
+    def reset(self, enemy_type, path, wave_scaling=None, assets=None):
+        """(Re)initialize in place, so pooled enemies can be spawned again without allocating"""
         self.type = enemy_type
-        self.stats = ENEMY_TYPES[enemy_type].copy()  # Make a copy to modify
+        self.stats.clear()
+        self.stats.update(ENEMY_TYPES[enemy_type])  # Our own copy to modify
         
         # Apply wave scaling if provided
         if wave_scaling:
@@ -14,64 +35,46 @@ class Enemy(pygame.sprite.Sprite):
             self.stats['speed'] = self.stats['speed'] * wave_scaling['speed_scale']
             self.stats['reward'] = int(self.stats['reward'] * wave_scaling['health_scale'])  # Scale reward with health
         
-        # Create circular enemy sprite with tech effect
-        size = TILE_SIZE - 4
-        self.base_image = pygame.Surface((size, size), pygame.SRCALPHA)
-        
-        # Draw main circle
-        pygame.draw.circle(
-            self.base_image,
-            self.stats['color'],
-            (size // 2, size // 2),
-            size // 2
-        )
-        
-        # Add tech pattern
-        inner_size = size // 2
-        pygame.draw.circle(
-            self.base_image,
-            (*self.stats['color'][:3], 150),  # Lighter version of color
-            (size // 2, size // 2),
-            inner_size,
-            2
-        )
-        
-        # Add binary pattern (small dots in a circle)
-        for i in range(8):
-            angle = i * (math.pi / 4)
-            x = size // 2 + int(math.cos(angle) * (inner_size - 4))
-            y = size // 2 + int(math.sin(angle) * (inner_size - 4))
-            pygame.draw.circle(
-                self.base_image,
-                WHITE,
-                (x, y),
-                1
-            )
-        
+        self.base_image = self.assets.get_enemy_image(enemy_type)
         self.image = self.base_image
-        self.rect = self.image.get_rect()
         
-        # Path following
-        self.path_points = path_points
+        # Path following: progress is the distance travelled along the path
+        self.path = path
+        self.path_points = path.points
+        self.distance = 0.0
         self.path_index = 0
         self.reached_end = False
         
-        # Convert grid coordinates to pixel coordinates for starting position
-        start_x = path_points[0][0] * TILE_SIZE + TILE_SIZE // 2
-        start_y = path_points[0][1] * TILE_SIZE + TILE_SIZE // 2
-        self.rect.center = (start_x, start_y)
+        # Start at the first path point
+        self.rect.center = (path.xs[0], path.ys[0])
         
         # Stats
         self.max_health = self.stats['health']
         self.health = self.max_health
         self.speed = self.stats['speed']
         self.reward = self.stats['reward']
+        
+        # Status effects, kept up to date by the simulation's StatusTimers (see status_effects.py)
+        self.slow = 1.0
+        self.slow_until = 0.0
+        self.freeze_until = 0.0
+        self.permanent_slow = 1.0
+        self.speed_scale = 1.0
     
-    def draw_health_bar(self, surface):
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+    
+    def draw_health_bar(self, surface, rect=None):
+        # Draw above rect (e.g. an interpolated render position), defaulting to our own
+        if rect is None:
+            rect = self.rect
+        
         # Health bar dimensions
-        bar_width = self.rect.width + 4
+        bar_width = rect.width + 4
         bar_height = 4
-        bar_pos = (self.rect.centerx - bar_width // 2, self.rect.top - 8)
+        bar_pos = (rect.centerx - bar_width // 2, rect.top - 8)
         
         # Draw background (black)
         pygame.draw.rect(surface, BLACK, (*bar_pos, bar_width, bar_height))
@@ -85,39 +88,71 @@ class Enemy(pygame.sprite.Sprite):
                            (bar_pos[0], bar_pos[1], health_width, bar_height))
     
     def update(self, time_delta):
-        if self.path_index >= len(self.path_points) - 1:
-            self.reached_end = True
+        if self.reached_end:
             return
-            
-        # Get current and next points
-        current = self.path_points[self.path_index]
-        next_point = self.path_points[self.path_index + 1]
-        
-        # Convert grid coordinates to pixels
-        next_pos = (next_point[0] * TILE_SIZE + TILE_SIZE // 2,
-                   next_point[1] * TILE_SIZE + TILE_SIZE // 2)
         
-        # Calculate direction and distance
-        dx = next_pos[0] - self.rect.centerx
-        dy = next_pos[1] - self.rect.centery
-        distance = math.sqrt(dx * dx + dy * dy)
-        
-        # Move towards next point with speed scaled by time_delta
-        speed = self.stats['speed'] * time_delta * 60  # Scale to maintain same base speed
+        # Move along the path with speed scaled by time_delta
+        self.distance += self.stats['speed'] * self.speed_scale * time_delta * 60  # Scale to maintain same base speed
+        if self.distance >= self.path.total_length:
+            self.distance = self.path.total_length
+            self.reached_end = True
         
-        # If we're very close to the target point or can reach it this frame
-        if distance <= speed or distance < 1:
-            # Snap to the waypoint
-            self.rect.centerx = next_pos[0]
-            self.rect.centery = next_pos[1]
-            self.path_index += 1
-        else:
-            # Move proportionally
-            move_x = (dx / distance) * speed
-            move_y = (dy / distance) * speed
-            self.rect.x += move_x
-            self.rect.y += move_y
+        self.path_index, x, y = self.path.locate(self.distance)
+        self.rect.center = (int(x), int(y))
     
     def take_damage(self, amount):
         self.health -= amount
-        return self.health <= 0 
\ No newline at end of file
+        return self.health <= 0 
+
+class FlowEnemy(Enemy):
+    """Enemy on an open map, walking tile to tile down the shared flow field.
+
+    path is the FlowRoute of its spawn; distance is how far it has walked,
+    which is what towers compare to find the enemy furthest along.
+    """
+    __slots__ = ('x', 'y', 'target')
+    
+    def reset(self, enemy_type, path, wave_scaling=None, assets=None):
+        super().reset(enemy_type, path, wave_scaling, assets)
+        self.x = float(path.xs[0])
+        self.y = float(path.ys[0])
+        self.target = path.spawn  # Tile being walked to
+    
+    def update(self, time_delta):
+        if self.reached_end:
+            return
+        
+        field = self.path.field
+        dist = field.dist
+        step = self.stats['speed'] * self.speed_scale * time_delta * 60  # Scale to maintain same base speed
+        while step > 0:
+            target = self.target
+            if dist[target] == WALL:
+                # A tower went up on the tile ahead, go back to the middle of this one
+                target = self.target = (int(self.y) // TILE_SIZE) * field.width + int(self.x) // TILE_SIZE
+            
+            target_x = (target % field.width) * TILE_SIZE + TILE_SIZE // 2
+            target_y = (target // field.width) * TILE_SIZE + TILE_SIZE // 2
+            dx = target_x - self.x
+            dy = target_y - self.y
+            gap = math.hypot(dx, dy)
+            if gap > step:
+                self.x += dx * step / gap
+                self.y += dy * step / gap
+                self.distance += step
+                break
+            
+            # Reached the tile, pick the next one
+            self.x = target_x
+            self.y = target_y
+            self.distance += gap
+            step -= gap
+            if dist[target] == 0:
+                self.reached_end = True
+                break
+            next_tile = field.next_tile(target)
+            if next_tile is None:
+                break  # Walled in, wait for a way out
+            self.target = next_tile
+        
+        self.rect.center = (int(self.x), int(self.y))
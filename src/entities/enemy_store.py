@@ -0,0 +1,324 @@
+import pygame
+import numpy as np
+from ..core.settings import *
+from ..managers.asset_manager import AssetManager
+from .enemy import Enemy
+
+class EnemyStore:
+    """Structure-of-arrays storage that moves a whole wave of enemies at once.
+
+    Positions, path indices, speeds and health live in contiguous NumPy
+    arrays indexed by slot, and `advance` steps every enemy along its path in
+    one vectorized pass per route. Each slot is exposed to the rest of the
+    game through an `EnemyView` sprite that reads and writes the arrays.
+
+    routes is the map's list of PathTables; each enemy follows one of them.
+    Slots are reused, so wherever the sprite version goes through enemies in
+    spawn order (the grid buckets, reached_end, ties in the ProgressIndex)
+    the store orders slots by `spawn_order` instead.
+    """
+
+    def __init__(self, routes, capacity=256, assets=None):
+        self.assets = assets if assets is not None else AssetManager.shared()
+
+        # Arc-length table of each route as (xs, ys, lengths) arrays for np.interp
+        self.routes = routes
+        self.route_tables = [
+            (np.array(path.xs, dtype=np.float64),
+             np.array(path.ys, dtype=np.float64),
+             np.array(path.lengths, dtype=np.float64))
+            for path in routes
+        ]
+
+        self.capacity = 0
+        self.size = 0  # One past the highest slot ever used
+        self.free_slots = []
+        self.spawned = 0  # Enemies spawned so far, the next spawn_order
+
+        # Until this game time, or while any active enemy is permanently slowed, advance applies status effects
+        self.effects_until = 0.0
+        self.permanently_slowed = 0  # Active enemies with a permanent slow
+        self.views = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Grow the arrays to capacity slots, keeping existing enemies"""
+        def grow(array, dtype):
+            grown = np.zeros(capacity, dtype=dtype)
+            if array is not None:
+                grown[:self.capacity] = array
+            return grown
+
+        self.x = grow(getattr(self, 'x', None), np.float64)
+        self.y = grow(getattr(self, 'y', None), np.float64)
+        self.distance = grow(getattr(self, 'distance', None), np.float64)
+        self.path_index = grow(getattr(self, 'path_index', None), np.int32)
+        self.route = grow(getattr(self, 'route', None), np.int32)
+        self.end = grow(getattr(self, 'end', None), np.float64)  # Length of the slot's route
+        self.speed = grow(getattr(self, 'speed', None), np.float64)
+        self.slow = grow(getattr(self, 'slow', None), np.float64)  # Status effects, see status_effects.py
+        self.slow_until = grow(getattr(self, 'slow_until', None), np.float64)
+        self.freeze_until = grow(getattr(self, 'freeze_until', None), np.float64)
+        self.permanent_slow = grow(getattr(self, 'permanent_slow', None), np.float64)
+        self.health = grow(getattr(self, 'health', None), np.int64)
+        self.max_health = grow(getattr(self, 'max_health', None), np.int64)
+        self.active = grow(getattr(self, 'active', None), np.bool_)
+        self.spawn_order = grow(getattr(self, 'spawn_order', None), np.int64)
+        self.views.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.size - len(self.free_slots)
+
+    def spawn(self, enemy_type, wave_scaling=None, slot=None, route=0):
+        """Add an enemy at the start of the route-th path and return its view.
+
+        slot puts it in a specific slot (when restoring a snapshot); the
+        caller is then responsible for size and free_slots.
+        """
+        if slot is not None:
+            capacity = self.capacity
+            while slot >= capacity:
+                capacity *= 2
+            if capacity != self.capacity:
+                self._allocate(capacity)
+            self.size = max(self.size, slot + 1)
+        elif self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.size == self.capacity:
+                self._allocate(self.capacity * 2)
+            slot = self.size
+            self.size += 1
+
+        path = self.routes[route]
+        view = EnemyView(self, slot, enemy_type, wave_scaling, path)
+        self.x[slot] = path.xs[0]
+        self.y[slot] = path.ys[0]
+        self.distance[slot] = 0.0
+        self.path_index[slot] = 0
+        self.route[slot] = route
+        self.end[slot] = path.total_length
+        self.speed[slot] = view.stats['speed']
+        self.slow[slot] = 1.0
+        self.slow_until[slot] = 0.0
+        self.freeze_until[slot] = 0.0
+        self.permanent_slow[slot] = 1.0
+        self.health[slot] = view.stats['health']
+        self.max_health[slot] = view.stats['health']
+        self.active[slot] = True
+        self.spawn_order[slot] = self.spawned
+        self.spawned += 1
+        self.views[slot] = view
+        return view
+
+    def release(self, view):
+        """Free a view's slot for reuse; stale views of a reused slot are ignored"""
+        slot = view.slot
+        if self.views[slot] is view:
+            if self.permanent_slow[slot] < 1:
+                self.permanently_slowed -= 1
+            self.active[slot] = False
+            self.views[slot] = None
+            self.free_slots.append(slot)
+
+    def advance(self, time_delta, now=0.0):
+        """Move every active enemy along the path by its speed, as Enemy.update does.
+
+        now is the game time, for the status effects slowing enemies down.
+        """
+        n = self.size
+        moving = self.active[:n] & (self.distance[:n] < self.end[:n])
+        slots = np.flatnonzero(moving)
+        if not len(slots):
+            return
+
+        speed = self.speed[slots]
+        if now < self.effects_until or self.permanently_slowed:
+            speed *= self.speed_scale(slots, now)
+        distance = self.distance[slots] + speed * (time_delta * 60)  # Scale to maintain same base speed
+        np.minimum(distance, self.end[slots], out=distance)
+        self.distance[slots] = distance
+
+        # Positions are an interpolation into each route's arc-length table
+        if len(self.route_tables) == 1:
+            self._locate(slots, distance, *self.route_tables[0])
+            return
+        routes = self.route[slots]
+        for route, table in enumerate(self.route_tables):
+            on_route = routes == route
+            if on_route.any():
+                self._locate(slots[on_route], distance[on_route], *table)
+
+    def _locate(self, slots, distance, path_x, path_y, path_lengths):
+        self.x[slots] = np.interp(distance, path_lengths, path_x)
+        self.y[slots] = np.interp(distance, path_lengths, path_y)
+        self.path_index[slots] = np.searchsorted(path_lengths, distance, side='right') - 1
+
+    def speed_scale(self, slots, now):
+        """Speed factor of each of slots at game time now, as status_effects.speed_scale computes it"""
+        permanent = self.permanent_slow[slots]
+        scale = np.where(self.slow_until[slots] > now, self.slow[slots] * permanent, permanent)
+        scale[self.freeze_until[slots] > now] = 0.0
+        return scale
+
+    def apply_effect(self, slots, effect, now):
+        """Put a StatusEffect on the enemies in slots (distinct) at game time now, as StatusTimers.apply does"""
+        slots = np.asarray(slots, dtype=np.int64)
+        if effect.freeze > 0:
+            self.freeze_until[slots] = np.maximum(self.freeze_until[slots], now + effect.freeze)
+        if effect.slow_duration > 0:
+            slow = self.slow[slots]
+            until = self.slow_until[slots]
+            until_new = np.maximum(self.freeze_until[slots], now) + effect.slow_duration
+            replace = (until <= now) | (effect.slow < slow)
+            extend = ~replace & (slow == effect.slow) & (until < until_new)
+            self.slow[slots[replace]] = effect.slow
+            self.slow_until[slots[replace | extend]] = until_new
+        if effect.permanent_slow < 1:
+            permanent = self.permanent_slow[slots]
+            slowed = np.maximum(permanent * effect.permanent_slow, effect.permanent_floor)
+            self.permanent_slow[slots] = slowed
+            self.permanently_slowed += int(np.count_nonzero((slowed < 1) & (permanent >= 1)))
+        self.effects_until = max(self.effects_until, float(self.freeze_until[slots].max()),
+                                 float(self.slow_until[slots].max()))
+
+    def query_radius(self, grid, center, radius):
+        """Slots of active enemies whose center is strictly within radius, in SpatialGrid.query_radius order"""
+        cx, cy = center
+        views = grid.query_box(cx - radius, cy - radius, cx + radius, cy + radius)
+        slots = np.fromiter((view.slot for view in views), dtype=np.int64, count=len(views))
+        slots = slots[self.active[slots]]
+        dx = self.x[slots].astype(np.int64) - cx  # Whole pixels, like the views' rects
+        dy = self.y[slots].astype(np.int64) - cy
+        return slots[dx * dx + dy * dy < radius * radius]
+
+    def apply_hits(self, slots, damage):
+        """Subtract damage[i] from the enemy in slots[i] for every hit in one pass.
+
+        Hits land in list order; returns the indices of the hits that killed
+        their enemy (took its health to zero or below), in that order.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        damage = np.asarray(damage)
+
+        # Group each enemy's hits together, keeping their order, and total them up cumulatively
+        order = np.argsort(slots, kind='stable')
+        grouped = slots[order]
+        grouped_damage = damage[order]
+        dealt = np.cumsum(grouped_damage)
+        starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+        ends = np.r_[starts[1:], len(grouped)]
+        dealt -= np.repeat(dealt[starts] - grouped_damage[starts], ends - starts)
+
+        health = self.health[grouped] - dealt
+        killing = (health <= 0) & (health + grouped_damage > 0)
+        self.health[grouped[ends - 1]] = health[ends - 1]
+        return np.sort(order[killing]).tolist()
+
+    def active_slots(self):
+        """Slots of the active enemies in spawn order"""
+        slots = np.flatnonzero(self.active[:self.size])
+        return slots[np.argsort(self.spawn_order[slots], kind='stable')]
+
+    def reached_end(self):
+        """Return the views of enemies that have reached the end of the path, in spawn order"""
+        slots = self.active_slots()
+        slots = slots[self.distance[slots] >= self.end[slots]]
+        return [self.views[slot] for slot in slots.tolist()]
+
+    def rebuild_grid(self, grid):
+        """Bucket every active enemy into a SpatialGrid without touching each sprite,
+        each bucket in spawn order like SpatialGrid.rebuild"""
+        slots = self.active_slots()
+        cell_size = grid.cell_size
+        cells = {}
+        if len(slots):
+            cell_x = self.x[slots].astype(np.int64) // cell_size
+            cell_y = self.y[slots].astype(np.int64) // cell_size
+            keys = cell_y * (1 << 20) + cell_x
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            sorted_slots = slots[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            ends = np.r_[starts[1:], len(sorted_keys)]
+            # Cells in order of their first enemy, as the grid's dict fills in SpatialGrid.rebuild
+            first = np.argsort(order[starts], kind='stable')
+            starts, ends = starts[first], ends[first]
+            views = self.views
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                key = (int(cell_x[order[start]]), int(cell_y[order[start]]))
+                cells[key] = [views[slot] for slot in sorted_slots[start:end].tolist()]
+        grid.cells = cells
+        grid.count = len(slots)
+        grid.extent = (TILE_SIZE - 4) // 2 + 1
+
+
+class EnemyView(pygame.sprite.Sprite):
+    """Sprite facade over one EnemyStore slot, used for drawing, targeting and hits"""
+
+    def __init__(self, store, slot, enemy_type, wave_scaling=None, path=None):
+        super().__init__()
+        self.store = store
+        self.slot = slot
+        self.type = enemy_type
+        self.stats = ENEMY_TYPES[enemy_type].copy()
+
+        # Apply wave scaling if provided
+        if wave_scaling:
+            self.stats['health'] = int(self.stats['health'] * wave_scaling['health_scale'])
+            self.stats['speed'] = self.stats['speed'] * wave_scaling['speed_scale']
+            self.stats['reward'] = int(self.stats['reward'] * wave_scaling['health_scale'])  # Scale reward with health
+
+        self.image = store.assets.get_enemy_image(enemy_type)
+        self.path = path if path is not None else store.routes[0]
+        self.path_points = self.path.points
+        self.reward = self.stats['reward']
+
+    @property
+    def rect(self):
+        rect = self.image.get_rect()
+        rect.center = (int(self.store.x[self.slot]), int(self.store.y[self.slot]))
+        return rect
+
+    @property
+    def health(self):
+        return int(self.store.health[self.slot])
+
+    @health.setter
+    def health(self, value):
+        self.store.health[self.slot] = value
+
+    @property
+    def max_health(self):
+        return int(self.store.max_health[self.slot])
+
+    @property
+    def speed(self):
+        return float(self.store.speed[self.slot])
+
+    @property
+    def distance(self):
+        return float(self.store.distance[self.slot])
+
+    @property
+    def path_index(self):
+        return int(self.store.path_index[self.slot])
+
+    @property
+    def reached_end(self):
+        return self.store.distance[self.slot] >= self.store.end[self.slot]
+
+    draw_health_bar = Enemy.draw_health_bar
+
+    def update(self, time_delta):
+        # Movement happens for the whole store in EnemyStore.advance
+        pass
+
+    def take_damage(self, amount):
+        self.store.health[self.slot] -= amount
+        return self.store.health[self.slot] <= 0
+
+    def kill(self):
+        super().kill()
+        self.store.release(self)
@@ -1,39 +1,74 @@
 import pygame
 import math
+import weakref
 from ..core.settings import *
+from ..managers.asset_manager import AssetManager
 
 class Projectile(pygame.sprite.Sprite):
-    def __init__(self, start_pos, target_pos, damage, speed=8, color=WHITE):
+    # Fixed attribute layout; instances are pooled and reset in place
+    __slots__ = ('pos', 'target', 'image', 'rect', 'damage', 'speed', 'trail_points',
+                 'max_trail_length', 'direction', 'initial_pos', 'owner', 'splash_radius',
+                 'effect', 'pool', 'pooled_in_use')
+    
+    def __init__(self, start_pos, target_pos, damage, speed=8, color=WHITE, owner=None, assets=None,
+                 splash_radius=0, effect=None):
         super().__init__()
-        self.pos = pygame.math.Vector2(start_pos)
-        self.target = pygame.math.Vector2(target_pos)
-        
-        # Create tech-themed projectile
-        size = 8
-        self.image = pygame.Surface((size, size), pygame.SRCALPHA)
-        
-        # Draw main particle
-        pygame.draw.circle(self.image, WHITE, (size//2, size//2), size//2)
-        
-        # Add glow effect
-        glow_size = size * 2
-        glow_surf = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
-        pygame.draw.circle(glow_surf, (255, 255, 255, 128), 
-                          (glow_size//2, glow_size//2), glow_size//2)
+        self.pos = pygame.math.Vector2()
+        self.target = pygame.math.Vector2()
+        self.direction = pygame.math.Vector2()
+        self.pool = None
+        self.pooled_in_use = False
         
-        self.image = glow_surf
-        self.rect = self.image.get_rect(center=start_pos)
-        self.damage = damage
-        self.speed = speed
+        # Tech-themed glowing particle, shared between all projectiles
+        if assets is None:
+            assets = AssetManager.shared()
+        self.image = assets.get_projectile_image()
+        self.rect = self.image.get_rect()
         
         # Trail effect
         self.trail_points = []
         self.max_trail_length = 5
         
+        self.reset(start_pos, target_pos, damage, speed, color, owner, splash_radius=splash_radius, effect=effect)
+    
+    def reset(self, start_pos, target_pos, damage, speed=8, color=WHITE, owner=None, assets=None,
+              splash_radius=0, effect=None):
+        """(Re)initialize in place, so pooled projectiles can be fired again without allocating"""
+        self.pos.update(start_pos)
+        self.target.update(target_pos)
+        self.rect.center = start_pos
+        self.damage = damage
+        self.speed = speed
+        self.trail_points.clear()
+        
         # Calculate direction
-        to_target = self.target - self.pos
-        self.direction = to_target.normalize() if to_target.length() > 0 else pygame.math.Vector2(0, 0)
+        self.direction.update(self.target.x - self.pos.x, self.target.y - self.pos.y)
+        if self.direction.x or self.direction.y:
+            self.direction.normalize_ip()
         self.initial_pos = start_pos
+        
+        # Weak reference to the firing tower so kills are credited without keeping sold towers alive
+        self.owner = weakref.ref(owner) if owner is not None else None
+        
+        # Explodes on impact, damaging every enemy within this many pixels, when non-zero
+        self.splash_radius = splash_radius
+        
+        # StatusEffect put on every enemy it damages, or None
+        self.effect = effect
+    
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+    
+    def get_owner(self):
+        """Return the tower that fired this projectile, or None if it was sold"""
+        if self.owner is None:
+            return None
+        tower = self.owner()
+        if tower is None or not tower.alive():
+            return None
+        return tower
     
     def update(self, time_delta):
         # Calculate direction to target
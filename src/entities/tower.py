@@ -1,26 +1,35 @@
 import pygame
 import math
 from ..core.settings import *
+from ..managers.asset_manager import AssetManager
+from ..core.status_effects import effect_from_stats
 from .projectile import Projectile
 
+# Rendered enemy positions are truncated to whole pixels, so coverage is padded by this much
+COVERAGE_MARGIN = 2
+
 class Tower(pygame.sprite.Sprite):
-    def __init__(self, tower_type, pos):
+    def __init__(self, tower_type, pos, assets=None, projectile_pool=None, stats=None):
         super().__init__()
         self.type = tower_type
-        self.stats = TOWER_TYPES[tower_type]
+        self.stats = stats if stats is not None else TOWER_TYPES[tower_type]
         
-        # Create tower sprite
-        self.base_image = pygame.Surface((TILE_SIZE - 4, TILE_SIZE - 4))
-        self.base_image.fill(self.stats['color'])
+        # Create tower sprite from the shared surface cache
+        self.assets = assets if assets is not None else AssetManager.shared()
+        self.base_image = self.assets.get_tower_image(tower_type)
         self.image = self.base_image
         self.rect = self.image.get_rect(center=pos)
         self.pos = pygame.math.Vector2(pos)
         
+        # Projectiles come from a shared pool when the simulation provides one
+        self.projectile_pool = projectile_pool
+        
         # Stats
         self.damage = self.stats['damage']
         self.range = self.stats['range']
         self.cooldown = self.stats['cooldown']
         self.cooldown_remaining = 0  # Initialize cooldown timer
+        self.effect = effect_from_stats(self.stats)  # Slows and freezes its hits apply, or None
         
         # Tower stats tracking
         self.enemies_defeated = 0
@@ -30,42 +39,99 @@ class Tower(pygame.sprite.Sprite):
         # Selection state
         self.selected = False
         self.current_target = None
+        
+        # Stretches of the path in range, set by the simulation once the tower is placed
+        self.coverage_routes = None
+        self.coverage = None
+        self.coverage_range = None
+        self.covers_all = False
+    
+    def set_coverage(self, routes):
+        """Precompute which arc-length intervals of each route are in range; None drops them"""
+        self.coverage_routes = routes
+        if routes is None:
+            self.coverage = None
+            self.covers_all = False
+            return
+        center = self.rect.center
+        self.coverage = [path.coverage(center, self.range + COVERAGE_MARGIN) for path in routes]
+        self.coverage_range = self.range
+        
+        # Towers that reach every tile of every route just shoot the lead enemy
+        self.covers_all = all(path.within(center, self.range - COVERAGE_MARGIN) for path in routes)
+    
+    def in_range(self, enemy):
+        cx, cy = self.rect.center
+        ex, ey = enemy.rect.center
+        return (ex - cx) ** 2 + (ey - cy) ** 2 < self.range * self.range
     
     def can_shoot(self):
         now = pygame.time.get_ticks()
         return now - self.last_shot >= self.cooldown
     
-    def get_target(self, enemies):
-        in_range_enemies = []
+    def drop_dead_target(self, enemies=None):
+        """Forget current_target once it was killed or has left enemies (pooled enemies get reused)"""
+        target = self.current_target
+        if target is not None and (not target.alive() or (enemies is not None and target not in enemies)):
+            self.current_target = None
+
+    def get_target(self, enemies, enemy_grid=None, progress=None):
+        # With path coverage, look up the furthest enemy along the stretches in range
+        if progress is not None and self.coverage is not None:
+            if self.coverage_range != self.range:
+                self.set_coverage(self.coverage_routes)  # Range changed since placement
+            if self.covers_all:
+                target = progress.lead()
+            else:
+                target = progress.furthest(self.coverage, self.in_range)
+            if target is not None:
+                self.current_target = target
+            return target
         
-        # First, find all enemies in range
-        for enemy in enemies:
-            dist = math.hypot(
-                enemy.rect.centerx - self.rect.centerx,
-                enemy.rect.centery - self.rect.centery
-            )
-            if dist < self.range:
-                in_range_enemies.append((enemy, enemy.path_index))
+        # Find all enemies in range, using the spatial index when we have one
+        if enemy_grid is not None:
+            in_range_enemies = enemy_grid.query_radius(self.rect.center, self.range)
+        else:
+            in_range_enemies = [
+                enemy for enemy in enemies
+                if math.hypot(enemy.rect.centerx - self.rect.centerx,
+                              enemy.rect.centery - self.rect.centery) < self.range
+            ]
         
-        if not in_range_enemies:
-            return None
+        # Target the enemy furthest along the path (first one wins on ties)
+        target = None
+        best_distance = -1.0
+        for enemy in in_range_enemies:
+            if enemy.distance > best_distance:
+                target = enemy
+                best_distance = enemy.distance
         
-        # Sort by path index (descending) to target enemies furthest along the path
-        in_range_enemies.sort(key=lambda x: x[1], reverse=True)
+        if target is None:
+            return None
         
-        # Return the enemy furthest along the path
-        self.current_target = in_range_enemies[0][0]
+        self.current_target = target
         return self.current_target
     
-    def shoot(self, target, projectiles):
-        self.last_shot = pygame.time.get_ticks()
-        projectile = Projectile(
+    def make_projectile(self, target, damage):
+        if self.projectile_pool is not None:
+            create = self.projectile_pool.acquire
+        else:
+            create = Projectile
+        return create(
             self.rect.center,
             target.rect.center,
-            self.damage,
+            damage,
             speed=8,
-            color=WHITE
+            color=WHITE,
+            owner=self,
+            assets=self.assets,
+            splash_radius=self.stats.get('splash_radius', 0),
+            effect=self.effect
         )
+    
+    def shoot(self, target, projectiles):
+        self.last_shot = pygame.time.get_ticks()
+        projectile = self.make_projectile(target, self.damage)
         projectiles.add(projectile)
         self.shots_fired += 1
     
@@ -82,6 +148,7 @@ class Tower(pygame.sprite.Sprite):
             )
             
             # Draw line to current target if exists
+            self.drop_dead_target()
             if self.current_target:
                 pygame.draw.line(
                     surface,
@@ -91,6 +158,11 @@ class Tower(pygame.sprite.Sprite):
                     1
                 )
     
+    def record_kill(self, enemy):
+        """Credit this tower with defeating an enemy"""
+        self.enemies_defeated += 1
+        self.damage_dealt += enemy.stats['health']
+    
     def get_stats_text(self):
         return [
             f"Type: {self.type.title()}",
@@ -101,19 +173,14 @@ class Tower(pygame.sprite.Sprite):
             f"Damage Dealt: {self.damage_dealt}"
         ]
     
-    def update(self, enemies, projectiles, time_delta):
+    def update(self, enemies, projectiles, time_delta, enemy_grid=None, progress=None):
+        self.drop_dead_target(enemies)
         if self.cooldown_remaining <= 0:
             # Find target
-            target = self.get_target(enemies)
+            target = self.get_target(enemies, enemy_grid, progress)
             if target:
                 # Create projectile
-                projectile = Projectile(
-                    self.rect.center,
-                    target.rect.center,
-                    self.stats['damage'],
-                    speed=8,
-                    color=WHITE
-                )
+                projectile = self.make_projectile(target, self.stats['damage'])
                 projectiles.add(projectile)
                 self.shots_fired += 1
                 self.current_target = target
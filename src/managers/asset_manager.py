@@ -1,8 +1,153 @@
+import pygame
+import math
+from collections import OrderedDict
+from ..core.settings import *
+from ..core.maps import load_map
+
 class AssetManager:
+    """Loads assets and caches the procedurally drawn sprite and glow surfaces.
+
+    Entities of the same type share one surface, so spawning enemies, firing
+    projectiles and drawing glows never allocates a surface once the cache is
+    warm. Fonts and rendered text are cached the same way, the latter in a
+    bounded least-recently-used cache, and so are compiled maps. Cached
+    surfaces and maps must be treated as read-only.
+    """
+    _shared = None
+
     def __init__(self):
         self.images = {}
         self.sounds = {}
-    
+        self.surfaces = {}  # Generated surfaces keyed by (kind, *params)
+        self.fonts = {}  # Font objects keyed by (name, size)
+        self.text_cache = OrderedDict()  # Rendered text keyed by content and style
+        self.maps = {}  # Compiled maps keyed by name
+
+    @classmethod
+    def shared(cls):
+        """Return the process-wide asset manager used when an entity isn't given one"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
     def load_assets(self):
         # Will implement asset loading later
-        pass 
\ No newline at end of file
+        pass
+
+    def prewarm(self):
+        """Build every cached surface up front so nothing is drawn mid-wave"""
+        for enemy_type in ENEMY_TYPES:
+            self.get_enemy_image(enemy_type)
+        for tower_type in TOWER_TYPES:
+            self.get_tower_image(tower_type)
+        self.get_projectile_image()
+        for color in list(TOWER_GLOW_COLORS.values()) + list(ENEMY_GLOW_COLORS.values()):
+            self.get_glow(color, GLOW_RADIUS)
+        # Range previews while placing a tower, green where it can go and red where it can't
+        for radius in {stats['range'] for stats in TOWER_TYPES.values()}:
+            for color in (GREEN, RED):
+                self.get_glow((*color, 30), radius)
+
+    def _store(self, key, surface):
+        # Match the display format when there is one; headless simulations skip this
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.surfaces[key] = surface
+        return surface
+
+    def get_enemy_image(self, enemy_type):
+        key = ('enemy', enemy_type)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            return surface
+
+        # Create circular enemy sprite with tech effect
+        color = ENEMY_TYPES[enemy_type]['color']
+        size = TILE_SIZE - 4
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+
+        # Draw main circle
+        pygame.draw.circle(surface, color, (size // 2, size // 2), size // 2)
+
+        # Add tech pattern
+        inner_size = size // 2
+        pygame.draw.circle(
+            surface,
+            (*color[:3], 150),  # Lighter version of color
+            (size // 2, size // 2),
+            inner_size,
+            2
+        )
+
+        # Add binary pattern (small dots in a circle)
+        for i in range(8):
+            angle = i * (math.pi / 4)
+            x = size // 2 + int(math.cos(angle) * (inner_size - 4))
+            y = size // 2 + int(math.sin(angle) * (inner_size - 4))
+            pygame.draw.circle(surface, WHITE, (x, y), 1)
+
+        return self._store(key, surface)
+
+    def get_tower_image(self, tower_type):
+        key = ('tower', tower_type)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            return surface
+
+        surface = pygame.Surface((TILE_SIZE - 4, TILE_SIZE - 4))
+        surface.fill(TOWER_TYPES[tower_type]['color'])
+        return self._store(key, surface)
+
+    def get_projectile_image(self):
+        key = ('projectile',)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            return surface
+
+        # Tech-themed projectile: a soft white glowing particle
+        glow_size = 16
+        surface = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
+        pygame.draw.circle(surface, (255, 255, 255, 128),
+                          (glow_size//2, glow_size//2), glow_size//2)
+        return self._store(key, surface)
+
+    def get_font(self, size, name=None):
+        """Return a shared Font; name None is pygame's default font"""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(name, size)
+        return font
+
+    def render_text(self, text, size, color, name=None):
+        """Return antialiased text rendered with get_font, cached by content"""
+        key = (text, size, tuple(color), name)
+        surface = self.text_cache.get(key)
+        if surface is not None:
+            self.text_cache.move_to_end(key)
+            return surface
+
+        surface = self.get_font(size, name).render(text, True, color)
+        self.text_cache[key] = surface
+        if len(self.text_cache) > TEXT_CACHE_SIZE:
+            self.text_cache.popitem(last=False)
+        return surface
+
+    def get_map(self, name=None):
+        """Return the compiled map (DEFAULT_MAP if name is None), loading it from MAP_DIR once"""
+        name = name or DEFAULT_MAP
+        game_map = self.maps.get(name)
+        if game_map is None:
+            game_map = self.maps[name] = load_map(name)
+        return game_map
+
+    def get_glow(self, color, radius):
+        """Return a (radius*2, radius*2) surface with a filled circle of color"""
+        key = ('glow', tuple(color), radius)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            return surface
+
+        surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(surface, color, (radius, radius), radius)
+        return self._store(key, surface)
@@ -1,46 +1,103 @@
 import pygame
+from collections import deque
 from ..core.settings import *
 
+class SpawnLane:
+    """Run-length spawn queue with its own timer.
+
+    Holds [enemy_type, count] runs instead of one entry per enemy, so a wave
+    of thousands costs a handful of entries and each spawn is O(1). With
+    interleave=True the lane rotates between its runs after every spawn
+    instead of emptying them one after another.
+
+    routes are the map paths the lane sends enemies down, taken in turn.
+    """
+
+    def __init__(self, runs, spawn_delay, first_delay, interleave=False, routes=(0,)):
+        self.runs = deque([enemy_type, count] for enemy_type, count in runs if count > 0)
+        self.remaining = sum(count for enemy_type, count in self.runs)
+        self.spawn_delay = spawn_delay
+        self.timer = first_delay
+        self.interleave = interleave
+        self.routes = tuple(routes)
+        self.route_cursor = 0
+
+    def next_route(self):
+        route = self.routes[self.route_cursor]
+        self.route_cursor = (self.route_cursor + 1) % len(self.routes)
+        return route
+
+    def pop(self):
+        run = self.runs[0]
+        run[1] -= 1
+        if run[1] == 0:
+            self.runs.popleft()
+        elif self.interleave:
+            self.runs.rotate(-1)
+        self.remaining -= 1
+        return run[0]
+
+
 class WaveManager:
     def __init__(self, game):
         self.game = game
         self.current_wave = 0
         self.wave_in_progress = False
-        self.enemies_to_spawn = []
+        self.lanes = []
         self.spawn_delay = 1.0  # Seconds between enemy spawns
-        self.spawn_timer = 0.0  # Timer for next spawn
-    
+
+    @property
+    def enemies_remaining(self):
+        """Number of enemies still waiting to spawn this wave"""
+        return sum(lane.remaining for lane in self.lanes)
+
     def start_wave(self):
-        if not self.wave_in_progress and self.current_wave < len(WAVE_CONFIGS):
+        if not self.wave_in_progress and self.game.waves.has_wave(self.current_wave):
             self.wave_in_progress = True
-            wave_config = WAVE_CONFIGS[self.current_wave]
-            
-            # Create list of enemies to spawn
-            self.enemies_to_spawn = []
-            for enemy_type, count in wave_config['enemies']:
-                self.enemies_to_spawn.extend([enemy_type] * count)
-            
-            self.spawn_timer = wave_config.get('spawn_delay', 1.0)  # Get spawn delay or default to 1.0
+            wave_config = self.game.waves[self.current_wave]
+            first_delay = wave_config.get('spawn_delay', 1.0)  # Get spawn delay or default to 1.0
+
+            # Waves can define parallel lanes, each with its own runs and timer;
+            # otherwise all of the wave's enemies spawn from a single lane.
+            # A lane alternates between the map's paths unless it names its own.
+            lane_configs = wave_config.get('lanes') or [{'enemies': wave_config['enemies']}]
+            self.lanes = [
+                SpawnLane(lane['enemies'],
+                          lane.get('spawn_delay', self.spawn_delay),
+                          lane.get('first_delay', first_delay),
+                          lane.get('interleave', False),
+                          self.lane_routes(lane))
+                for lane in lane_configs
+            ]
+
             self.current_wave += 1
             return True
         return False
-    
+
+    def lane_routes(self, lane):
+        route_count = len(self.game.routes)
+        routes = lane.get('path', range(route_count))
+        if isinstance(routes, int):
+            routes = [routes]
+        routes = list(routes)
+        if not routes or not all(0 <= route < route_count for route in routes):
+            raise ValueError(f"spawn lane path {lane.get('path')} is not on this map ({route_count} paths)")
+        return routes
+
     def update(self, time_delta):
         if not self.wave_in_progress:
             return
-        
-        # Update spawn timer with time_delta
-        self.spawn_timer -= time_delta
-        
-        if self.spawn_timer <= 0 and self.enemies_to_spawn:
-            # Spawn next enemy
-            enemy_type = self.enemies_to_spawn.pop(0)
-            self.game.spawn_enemy(enemy_type)
-            
-            # Reset timer for next spawn
-            self.spawn_timer = self.spawn_delay
-        
+
+        # Spawn every enemy that came due during this tick, not just one
+        for lane in self.lanes:
+            if not lane.remaining:
+                continue
+            lane.timer -= time_delta
+            while lane.timer <= 0 and lane.remaining:
+                self.game.spawn_enemy(lane.pop(), lane.next_route())
+                lane.timer += lane.spawn_delay
+
         # Check if wave is complete
-        if not self.enemies_to_spawn and not self.game.enemies:
+        if not self.enemies_remaining and not self.game.enemies:
             self.wave_in_progress = False
-            self.game.wave_completed() 
\ No newline at end of file
+            self.game.wave_completed()